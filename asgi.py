@@ -0,0 +1,127 @@
+"""ASGI entry point, for serving the app from uvicorn workers:
+
+    gunicorn -c gunicorn.conf.py                # with TECHFIX_SERVER=asgi, see gunicorn.conf.py
+    uvicorn asgi:application --port 8000        # a single process, for trying it out
+
+The event loop only deals with sockets, so idle keep-alive connections and
+slow clients cost next to nothing. Each request still runs the ordinary Flask
+view code, on a pool of TECHFIX_ASGI_THREADS threads per process, which is
+where its blocking SQLite queries and file I/O happen without holding up the
+loop or the other requests.
+
+asgiref's plain WsgiToAsgi runs every request on one shared thread
+(thread_sensitive=True), which would serialise the whole process; the pool
+below replaces it. Flask-SQLAlchemy scopes sessions to the app context, which
+Flask pushes per request in whichever thread runs it, so requests sharing the
+pool never share a session or a connection.
+
+Live update streams (GET /problem/<id>/events, see techfix/live.py) are
+served here directly: they spend their life waiting, which the event loop
+does for free while a thread would be tied up per open page.
+When a worker stops, open streams are cut after gunicorn's graceful_timeout;
+browsers reconnect to another worker and catch up on what they missed.
+"""
+import asyncio
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from techfix import create_app, live
+
+THREADS = int(os.environ.get('TECHFIX_ASGI_THREADS', 32))
+
+executor = ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix='asgi-request')
+
+EVENTS_PATH = re.compile(r'/problem/(\d+)/events')
+
+
+class PooledWsgiInstance(WsgiToAsgiInstance):
+    # The same method, undecorated and wrapped again to run on our pool
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func,
+                                 thread_sensitive=False, executor=executor)
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi running requests on `executor`, and answering the lifespan protocol"""
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    executor.shutdown(wait=True)
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        match = EVENTS_PATH.fullmatch(scope['path']) if scope['type'] == 'http' else None
+        if match and scope['method'] == 'GET':
+            await problem_events(self.wsgi_application, int(match.group(1)), scope, receive, send)
+            return
+        await PooledWsgiInstance(self.wsgi_application)(scope, receive, send)
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def problem_events(flask_app, problem_id, scope, receive, send):
+    """A problem's live update stream, written from the event loop as events arrive"""
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+
+    def wake():
+        # Called from whichever thread published or tailed the event
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            pass    # the loop has closed; we are shutting down
+
+    def subscribe():
+        with flask_app.app_context():
+            return live.open_stream(problem_id, dict(scope['headers']).get(b'last-event-id', b'').decode('latin1'),
+                                    wakeup=wake)
+
+    subscription = await loop.run_in_executor(executor, subscribe)
+    if subscription is None:
+        await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+        await send({'type': 'http.response.body'})
+        return
+
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        chunk = f'retry: {live.RETRY_MS}\n\n'
+        while True:
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+            if subscription.overflowed:
+                break       # the client reconnects and catches up
+            wakeup.clear()
+            events = subscription.drain()
+            if events:
+                chunk = ''.join(map(live.sse_message, events))
+                continue
+            woken = asyncio.ensure_future(wakeup.wait())
+            done, _ = await asyncio.wait({woken, disconnected}, timeout=flask_app.config['LIVE_HEARTBEAT'],
+                                         return_when=asyncio.FIRST_COMPLETED)
+            woken.cancel()
+            if disconnected in done:
+                return
+            chunk = '' if woken in done else ': keep-alive\n\n'
+        await send({'type': 'http.response.body'})
+    finally:
+        subscription.close()
+        disconnected.cancel()
+
+
+app = create_app()
+application = PooledWsgiToAsgi(app)
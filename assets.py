@@ -0,0 +1,119 @@
+"""Fingerprinted static assets.
+
+`asset_url('main.css')` returns `/assets/main.<hash>.css`. Because the URL
+changes whenever the content does, those responses can be cached by browsers
+for a year without revalidation. `build()` writes gzip (and, when the
+`brotli` package is installed, brotli) copies of text assets that are served
+instead of the original to clients that accept them.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+
+from flask import request, send_from_directory, url_for
+from werkzeug.exceptions import NotFound
+
+try:
+    import brotli
+except ImportError:  # precompressed .br variants are optional
+    brotli = None
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.ico', '.map'}
+CONTENT_ADDRESSED = re.compile(r'(^|/)[0-9a-f]{64}(_\d+)?\.\w+$')
+
+
+class AssetPipeline:
+    """Serves files from the static folder under content-hashed names"""
+
+    def __init__(self, app, build_dir, url_prefix='/assets', exclude=('uploads',)):
+        self.app = app
+        self.build_dir = build_dir
+        self.exclude = tuple(exclude)
+        self._manifest = None      # original name -> fingerprinted name
+        self._originals = None     # fingerprinted name -> original name
+
+        app.add_url_rule(f'{url_prefix}/<path:filename>', 'asset', self.serve)
+        app.add_template_global(self.url, 'asset_url')
+        app.after_request(self.static_cache_headers)
+
+    def manifest(self):
+        if self._manifest is None or self.app.debug:
+            manifest = {}
+            root = self.app.static_folder
+            for directory, dirs, files in os.walk(root):
+                relative = os.path.relpath(directory, root).replace(os.sep, '/')
+                if relative.split('/')[0] in self.exclude:
+                    dirs[:] = []
+                    continue
+                for name in files:
+                    filename = name if relative == '.' else f'{relative}/{name}'
+                    with open(os.path.join(directory, name), 'rb') as f:
+                        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+                    stem, ext = os.path.splitext(filename)
+                    manifest[filename] = f'{stem}.{digest}{ext}'
+            self._manifest = manifest
+            self._originals = {fingerprinted: name for name, fingerprinted in manifest.items()}
+        return self._manifest
+
+    def url(self, filename):
+        """Fingerprinted URL for a static file; plain static URL if it is not in the manifest"""
+        fingerprinted = self.manifest().get(filename)
+        if fingerprinted is None:
+            return url_for('static', filename=filename)
+        return url_for('asset', filename=fingerprinted)
+
+    def serve(self, filename):
+        self.manifest()
+        original = self._originals.get(filename)
+        if original is None:
+            raise NotFound()
+
+        accepted = request.accept_encodings
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if accepted[encoding] and os.path.exists(os.path.join(self.build_dir, filename + suffix)):
+                response = send_from_directory(self.build_dir, filename + suffix, max_age=31536000)
+                response.content_encoding = encoding
+                response.mimetype = mimetypes.guess_type(original)[0] or 'application/octet-stream'
+                break
+        else:
+            response = send_from_directory(self.app.static_folder, original, max_age=31536000)
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def static_cache_headers(self, response):
+        """Content-addressed uploads never change; others revalidate with their ETag"""
+        if request.endpoint == 'static' and response.status_code in (200, 304):
+            if CONTENT_ADDRESSED.search(request.view_args.get('filename', '')):
+                response.headers['Cache-Control'] = IMMUTABLE
+            else:
+                response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def build(self):
+        """Write gzip/brotli variants of compressible assets; returns the number written"""
+        os.makedirs(self.build_dir, exist_ok=True)
+        written = 0
+        for original, fingerprinted in self.manifest().items():
+            if os.path.splitext(original)[1].lower() not in COMPRESSIBLE:
+                continue
+            with open(os.path.join(self.app.static_folder, original), 'rb') as f:
+                data = f.read()
+            variants = {'.gz': gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(data, quality=11)
+            for suffix, compressed in variants.items():
+                path = os.path.join(self.build_dir, fingerprinted + suffix)
+                if len(compressed) >= len(data) or os.path.exists(path):
+                    continue
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.asset-')
+                with os.fdopen(fd, 'wb') as out:
+                    out.write(compressed)
+                os.replace(tmp_path, path)
+                written += 1
+        return written
@@ -0,0 +1,94 @@
+"""Plumbing shared by the pluggable backends (cache, rate limits, jobs, live updates, metrics).
+
+Backends that share state between the gunicorn workers of one host keep it
+in a small SQLite file of their own (SQLiteFile), and backends that work in
+the background run one thread per process (ProcessThread). make_backend()
+picks the backend a setting names.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+def make_backend(config, setting, factories, default='memory'):
+    """Call the factory in `factories` (name -> callable) that config[setting] names"""
+    name = config.get(setting, default)
+    if name not in factories:
+        raise ValueError(f'Unknown {setting}: {name}')
+    return factories[name]()
+
+
+class SQLiteFile:
+    """A SQLite file used from many threads and processes.
+
+    Each thread of each process gets its own autocommit connection in WAL
+    mode, so readers never block the writer. Writers take the lock up front
+    with transaction() (BEGIN IMMEDIATE) and queue for up to `timeout`
+    seconds rather than failing to upgrade a read lock.
+    """
+
+    def __init__(self, path, schema, timeout=5, synchronous='NORMAL', row_factory=None):
+        self.path = path
+        self.schema = schema
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self.row_factory = row_factory
+        self._local = threading.local()
+
+    def connection(self):
+        # Keyed by pid too: a forked worker must not reuse the connection its parent opened
+        pid, conn = getattr(self._local, 'conn', (None, None))
+        if pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            if self.row_factory:
+                conn.row_factory = self.row_factory
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+            conn.executescript(self.schema)
+            self._local.conn = (os.getpid(), conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+
+class ProcessThread:
+    """A daemon thread running `target`, started at most once per process.
+
+    Helpers start theirs lazily, on first use: a thread started before
+    gunicorn forks its workers would not exist in them, so each worker starts
+    its own. A target that means to end calls stopped() first, while holding
+    whatever lock guards the decision, so the next start() runs it again.
+    """
+
+    def __init__(self, target, name):
+        self.target = target
+        self.name = name
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def running(self):
+        return self._pid == os.getpid()
+
+    def start(self, *args):
+        """Start the thread unless it runs in this process already; returns whether it was started"""
+        if self.running():
+            return False
+        with self._lock:
+            if self.running():
+                return False
+            self._pid = os.getpid()
+        threading.Thread(target=self.target, args=args, name=self.name, daemon=True).start()
+        return True
+
+    def stopped(self):
+        self._pid = None
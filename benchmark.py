@@ -0,0 +1,421 @@
+"""Seed a synthetic dataset and measure latency, throughput and SQL queries per route.
+
+    python benchmark.py seed --users 1000 --problems 20000 --solutions 40000 --votes 100000
+    python benchmark.py run                              # in-process test client, counts queries
+    python benchmark.py run --gunicorn --workers 4       # over HTTP against a local gunicorn
+    python benchmark.py run --gunicorn --server sync,gthread,asgi --concurrency 64   # compare serving modes
+    python benchmark.py run --save-baseline bench.json   # record numbers before a change...
+    python benchmark.py run --baseline bench.json        # ...and exit 1 if a route got slower
+    python benchmark.py run --page-cache                 # let anonymous GETs hit the page cache
+
+Everything runs against instance/benchmark.db (and its own job queue), never
+the real database. Anonymous pages are normally answered from the page cache
+after the first request, which would measure a cache lookup; unless told
+otherwise each GET carries a query string of its own, so pages are rendered.
+"""
+import http.cookiejar
+import json
+import os
+import queue
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import click
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///benchmark.db')
+os.environ.setdefault('TECHFIX_JOBS_DATABASE', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            'instance', 'benchmark-jobs.db'))
+# Kept apart from the real site's cache, which gunicorn uses with more than one worker
+os.environ.setdefault('TECHFIX_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        'instance', 'benchmark-cache'))
+# Every simulated client logs in from 127.0.0.1; don't let the login throttle turn them away
+os.environ.setdefault('TECHFIX_RATELIMIT', 'null')
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert  # noqa: E402
+
+from techfix import create_app, upgrade_database  # noqa: E402
+from techfix.data import import_records  # noqa: E402
+from techfix.database import (count_queries, recompute_reputation, reconcile_counters,  # noqa: E402
+                              search_index_suspended)
+from techfix.extensions import db  # noqa: E402
+from techfix.models import Problem, Solution, User, Vote  # noqa: E402
+
+app = create_app()  # configured by the environment above
+
+PASSWORD = 'benchmark'
+CATEGORIES = ['Software', 'Hardware', 'Networking', 'Mobile', 'Security', 'Platform Bug']
+DEVICES = ['Laptop', 'Desktop', 'Phone', 'Tablet', 'Printer', 'Router']
+SYSTEMS = ['Windows 11', 'Windows 10', 'macOS', 'Ubuntu', 'Android', 'iOS']
+SUBJECTS = ['wifi', 'printer', 'python', 'bluetooth', 'driver', 'update', 'battery', 'screen',
+            'keyboard', 'browser', 'vpn', 'email', 'outlook', 'disk', 'memory', 'audio', 'camera',
+            'usb', 'router', 'dns', 'password', 'backup', 'antivirus', 'excel', 'docker', 'git']
+SYMPTOMS = ['not working', 'keeps crashing', 'very slow', 'will not install', 'disconnects',
+            'shows an error', 'stopped responding', 'not detected', 'fails after update']
+FILLER = ('I tried restarting and reinstalling but nothing changed. The error appears every time '
+          'I open the settings page and the device becomes unresponsive for a minute.').split()
+
+
+# ==================== SEEDING ====================
+def synthetic_records(rng, users, problems, solutions):
+    """Users, problems and solutions in the import-data record format"""
+    probe = User()
+    probe.set_password(PASSWORD)
+    password_hash = probe.password_hash   # hashing once keeps seeding fast
+    now = time.time()
+
+    def timestamp(offset):
+        return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now - offset))
+
+    for i in range(1, users + 1):
+        yield {'type': 'user', 'id': i, 'username': f'bench{i}', 'email': f'bench{i}@example.com',
+               'password_hash': password_hash, 'created_at': timestamp(rng.randint(0, 10 ** 8)),
+               'is_helper': i % 10 == 0, 'reputation': 0}
+    for i in range(1, problems + 1):
+        subject, symptom = rng.choice(SUBJECTS), rng.choice(SYMPTOMS)
+        yield {'type': 'problem', 'id': i, 'title': f'{subject.title()} {symptom} on {rng.choice(SYSTEMS)}',
+               'description': ' '.join(rng.choices(FILLER + [subject] * 5, k=rng.randint(30, 150))),
+               'category': rng.choice(CATEGORIES), 'device_type': rng.choice(DEVICES),
+               'operating_system': rng.choice(SYSTEMS), 'urgency': rng.choice(['low', 'medium', 'high']),
+               'views': int(rng.paretovariate(1.2)), 'user_id': rng.randint(1, users),
+               'created_at': timestamp(rng.randint(0, 10 ** 8))}
+    for i in range(1, solutions + 1):
+        steps = '\n'.join(f'Step {n}: ' + ' '.join(rng.choices(FILLER, k=12)) for n in range(1, rng.randint(3, 8)))
+        yield {'type': 'solution', 'id': i, 'title': f'Fix #{i}', 'steps': steps,
+               'difficulty': rng.choice(['Beginner', 'Intermediate', 'Advanced']), 'estimated_time': '10 min',
+               'upvotes': 0, 'downvotes': 0, 'problem_id': rng.randint(1, problems),
+               'user_id': rng.randint(1, users), 'created_at': timestamp(rng.randint(0, 10 ** 8))}
+
+
+def seed_votes(rng, users, solutions, votes, chunk_size=5000):
+    """Insert random votes; the vote triggers keep the solution counters in step"""
+    stmt = sqlite_insert(Vote).prefix_with('OR IGNORE')
+    remaining = votes
+    while remaining > 0:
+        batch = [{'user_id': rng.randint(1, users), 'solution_id': rng.randint(1, solutions),
+                  'value': 1 if rng.random() < 0.8 else -1, 'created_at': datetime.utcnow()}
+                 for _ in range(min(chunk_size, remaining))]
+        with db.engine.begin() as conn:
+            conn.execute(stmt, batch)
+        remaining -= len(batch)
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option('--users', default=1000, show_default=True)
+@click.option('--problems', default=20000, show_default=True)
+@click.option('--solutions', default=40000, show_default=True)
+@click.option('--votes', default=100000, show_default=True)
+@click.option('--seed', default=1, show_default=True, help='Random seed, for repeatable datasets.')
+def seed(users, problems, solutions, votes, seed):
+    """Replace the benchmark database with a synthetic dataset"""
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    with app.app_context():
+        upgrade_database()
+        with db.engine.begin() as conn:
+            for table in ('votes', 'solutions', 'problems', 'users'):
+                conn.exec_driver_sql(f'DELETE FROM {table}')
+        with search_index_suspended():
+            counts = import_records(synthetic_records(rng, users, problems, solutions), 5000)
+        seed_votes(rng, users, solutions, votes)
+        reconcile_counters()
+        recompute_reputation()
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+    summary = ', '.join(f"{count} {kind}s" for kind, count in counts.items())
+    print(f"✅ Seeded {summary} and up to {votes} votes in {time.perf_counter() - started:.1f}s")
+
+
+# ==================== SCENARIOS ====================
+class Dataset:
+    """Ids to draw requests from, read once from the benchmark database"""
+
+    def __init__(self):
+        with app.app_context():
+            self.problem_ids = [i for (i,) in db.session.query(Problem.id)]
+            self.solution_ids = [i for (i,) in db.session.query(Solution.id)]
+            if not self.problem_ids or not self.solution_ids:
+                raise click.ClickException('The benchmark database is empty; run `python benchmark.py seed` first')
+            self.user = User.query.order_by(User.id).first()
+            self.other_problem_ids = [i for (i,) in db.session.query(Problem.id).filter(
+                Problem.user_id != self.user.id)]
+            self.other_solution_ids = [i for (i,) in db.session.query(Solution.id).filter(
+                Solution.user_id != self.user.id)]
+
+
+# name -> (method, logged in, build(rng, data) -> (path, form data))
+SCENARIOS = {
+    'home': ('GET', False, lambda rng, d: ('/', None)),
+    'browse': ('GET', False, lambda rng, d: ('/browse', None)),
+    'browse-views': ('GET', False, lambda rng, d: ('/browse?sort=views', None)),
+    'browse-solutions': ('GET', False, lambda rng, d: ('/browse?sort=solutions', None)),
+    'browse-unsolved': ('GET', False, lambda rng, d: ('/browse?sort=unsolved', None)),
+    'browse-search': ('GET', False, lambda rng, d: (f'/browse?search={rng.choice(SUBJECTS)}', None)),
+    'problem': ('GET', False, lambda rng, d: (f'/problem/{rng.choice(d.problem_ids)}', None)),
+    'vote': ('POST', True, lambda rng, d: (f'/solution/{rng.choice(d.other_solution_ids)}/vote',
+                                           {'value': rng.choice(['up', 'down'])})),
+    'post-solution': ('POST', True, lambda rng, d: (f'/problem/{rng.choice(d.other_problem_ids)}/quick-solution',
+                                                    {'steps': 'Restart the device\nInstall updates'})),
+}
+
+
+def bypass_page_cache(path, run_id, n):
+    """`path` with a query parameter no other request shares, so cached_page never has it"""
+    return f"{path}{'&' if '?' in path else '?'}nocache={run_id}-{n}"
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(latencies, elapsed, queries=None):
+    result = {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'rps': round(len(latencies) / elapsed, 1),
+    }
+    if queries is not None:
+        result['queries'] = round(sum(queries) / len(queries), 2)
+    return result
+
+
+def run_in_process(names, data, requests, warmup, rng, page_cache):
+    """Sequential requests through the test client, counting SQL per request"""
+    run_id = f'{time.time_ns():x}'
+    client = app.test_client()
+    results = {}
+    for name in names:
+        method, logged_in, build = SCENARIOS[name]
+        with client.session_transaction() as session:
+            session.clear()
+            if logged_in:
+                session['_user_id'] = str(data.user.id)
+                session['_fresh'] = True
+        latencies, queries = [], []
+        for n in range(warmup + requests):
+            if n == warmup:
+                started = time.perf_counter()
+            path, form = build(rng, data)
+            if method == 'GET' and not page_cache:
+                path = bypass_page_cache(path, run_id, n)
+            with app.app_context(), count_queries() as statements:
+                begin = time.perf_counter()
+                response = client.open(path, method=method, data=form)
+                took = time.perf_counter() - begin
+            if response.status_code >= 400:
+                raise click.ClickException(f'{name}: {method} {path} returned HTTP {response.status_code}')
+            if n >= warmup:
+                latencies.append(took)
+                queries.append(len(statements))
+        results[name] = summarize(latencies, time.perf_counter() - started, queries)
+    return results
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def http_session(base_url, data):
+    """A cookie-keeping opener logged in as the benchmark user"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                         NoRedirect)
+    body = urllib.parse.urlencode({'username': data.user.username, 'password': PASSWORD}).encode()
+    fetch(opener, base_url + '/login', body)
+    return opener
+
+
+def fetch(opener, url, body=None):
+    try:
+        with opener.open(url, data=body, timeout=30) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        if e.code >= 400:
+            raise
+        return e.code
+
+
+def run_over_http(names, data, requests, warmup, concurrency, base_url, rng, page_cache):
+    """Requests from `concurrency` threads against a running server"""
+    run_id = f'{time.time_ns():x}'   # unique per run: a server left running may have cached earlier ones
+    # Log the clients in up front; password hashing is slow on purpose and would skew the numbers
+    sessions = queue.SimpleQueue()
+    if any(SCENARIOS[name][1] for name in names):
+        with ThreadPoolExecutor(concurrency) as pool:
+            for opener in pool.map(lambda _: http_session(base_url, data), range(concurrency)):
+                sessions.put(opener)
+
+    results = {}
+    for name in names:
+        method, logged_in, build = SCENARIOS[name]
+        plan = [build(rng, data) for _ in range(warmup + requests)]
+        if method == 'GET' and not page_cache:
+            plan = [(bypass_page_cache(path, run_id, n), form) for n, (path, form) in enumerate(plan)]
+
+        def one(request):
+            path, form = request
+            body = urllib.parse.urlencode(form).encode() if method == 'POST' else None
+            opener = sessions.get() if logged_in else urllib.request.build_opener(NoRedirect)
+            try:
+                begin = time.perf_counter()
+                fetch(opener, base_url + path, body)
+                return time.perf_counter() - begin
+            finally:
+                if logged_in:
+                    sessions.put(opener)
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(one, plan[:warmup]))
+            started = time.perf_counter()
+            latencies = list(pool.map(one, plan[warmup:]))
+            results[name] = summarize(latencies, time.perf_counter() - started)
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(server_mode, workers, threads):
+    """gunicorn with gunicorn.conf.py, serving in `server_mode` (sync, gthread or asgi)"""
+    port = free_port()
+    env = dict(os.environ, TECHFIX_SERVER=server_mode, TECHFIX_WORKERS=str(workers),
+               TECHFIX_THREADS=str(threads), TECHFIX_BIND=f'127.0.0.1:{port}')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--log-level', 'warning'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/about', timeout=1).read()
+            return server, base_url
+        except OSError:
+            if server.poll() is not None:
+                raise click.ClickException('gunicorn exited during startup')
+            time.sleep(0.2)
+    server.terminate()
+    raise click.ClickException('gunicorn did not start within 30s')
+
+
+# ==================== REPORTING ====================
+def print_report(results):
+    print(f"{'endpoint':<18}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['requests']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+              f"{r['rps']:>9}{r.get('queries', '-'):>9}")
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    """Regressions against a saved run: more queries, or a p95 slower by both `tolerance` and `floor_ms`.
+
+    The floor keeps millisecond routes from failing on scheduling noise, which
+    easily exceeds any relative tolerance at that scale.
+    """
+    problems = []
+    for name, r in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        if r['p95_ms'] > max(base['p95_ms'] * (1 + tolerance), base['p95_ms'] + floor_ms):
+            problems.append(f"{name}: p95 {base['p95_ms']}ms -> {r['p95_ms']}ms")
+        if 'queries' in r and 'queries' in base and r['queries'] > base['queries']:
+            problems.append(f"{name}: queries {base['queries']} -> {r['queries']}")
+    return problems
+
+
+@cli.command()
+@click.option('--endpoints', default=','.join(SCENARIOS), show_default=True, help='Comma-separated scenarios.')
+@click.option('--requests', 'count', default=200, show_default=True, help='Measured requests per endpoint.')
+@click.option('--warmup', default=10, show_default=True, help='Unmeasured requests per endpoint first.')
+@click.option('--url', default=None, help='Benchmark an already running server over HTTP.')
+@click.option('--gunicorn', 'use_gunicorn', is_flag=True, help='Start a local gunicorn and benchmark it.')
+@click.option('--workers', default=4, show_default=True, help='gunicorn worker processes.')
+@click.option('--server', 'server_modes', default='sync', show_default=True,
+              help='Comma-separated gunicorn serving modes to compare: sync, gthread, asgi.')
+@click.option('--threads', default=8, show_default=True, help='Threads per gunicorn worker (gthread, asgi).')
+@click.option('--concurrency', default=8, show_default=True, help='Concurrent clients in HTTP mode.')
+@click.option('--save-baseline', type=click.Path(dir_okay=False), help='Write the results to this file.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Fail on regressions against this file.')
+@click.option('--tolerance', default=0.2, show_default=True, help='Allowed p95 slowdown against the baseline.')
+@click.option('--floor', 'floor_ms', default=2.0, show_default=True,
+              help='p95 slowdowns up to this many ms never count as regressions.')
+@click.option('--page-cache', is_flag=True, help='Let repeated anonymous GETs be answered from the page cache.')
+@click.option('--seed', default=1, show_default=True)
+def run(endpoints, count, warmup, url, use_gunicorn, workers, server_modes, threads, concurrency,
+        save_baseline, baseline, tolerance, floor_ms, page_cache, seed):
+    """Benchmark the selected endpoints and print latency percentiles"""
+    names = [name.strip() for name in endpoints.split(',') if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise click.ClickException(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    server_modes = [mode.strip() for mode in server_modes.split(',') if mode.strip()]
+    unknown = set(server_modes) - {'sync', 'gthread', 'asgi'}
+    if unknown:
+        raise click.ClickException(f"Unknown server modes: {', '.join(sorted(unknown))}")
+    if use_gunicorn and len(server_modes) > 1 and (save_baseline or baseline):
+        raise click.ClickException('Baselines are kept for one server mode at a time')
+    data = Dataset()
+
+    for server_mode in server_modes if use_gunicorn else [None]:
+        rng = random.Random(seed)   # the same requests for every mode
+        server = None
+        if server_mode:
+            server, url = start_gunicorn(server_mode, workers, threads)
+        try:
+            if url:
+                mode = f'http {url}'
+                if server:
+                    mode = f'http gunicorn {server_mode} -w {workers}' + (f' --threads {threads}' if server_mode != 'sync' else '')
+                results = run_over_http(names, data, count, warmup, concurrency, url.rstrip('/'), rng, page_cache)
+            else:
+                mode = 'in-process'
+                results = run_in_process(names, data, count, warmup, rng, page_cache)
+            if page_cache:
+                mode += ', page cache'
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+        print(f"Mode: {mode}, {concurrency} concurrent clients" if url else f"Mode: {mode}")
+        print_report(results)
+
+    if save_baseline:
+        with open(save_baseline, 'w') as f:
+            json.dump({'mode': mode, 'results': results}, f, indent=2)
+        print(f"✅ Baseline saved to {save_baseline}")
+    if baseline:
+        with open(baseline) as f:
+            saved = json.load(f)
+        if saved.get('mode') != mode:
+            print(f"⚠️ Baseline was recorded in mode '{saved.get('mode')}'")
+        regressions = compare(results, saved, tolerance, floor_ms)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            raise SystemExit(1)
+        print("✅ No regressions against the baseline")
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from backends import make_backend
+
+
+class NullCache:
+    """Caches nothing; every lookup is a miss"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache:
+    """Per-process LRU cache with a time-to-live per entry (timeout=0 never expires)"""
+
+    def __init__(self, max_entries=1000, default_timeout=300):
+        self.max_entries = max_entries
+        self.default_timeout = default_timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires = time.monotonic() + timeout if timeout else 0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FileSystemCache:
+    """Cache shared by every worker on the host: one pickle file per key.
+
+    Writes go through a temporary file and an atomic rename, so readers in
+    other processes never see a partial entry.
+    """
+
+    def __init__(self, cache_dir, max_entries=5000, default_timeout=300):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.default_timeout = default_timeout
+        self._writes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires = pickle.load(f)
+                if expires and expires < time.time():
+                    os.remove(path)
+                    return None
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.PickleError):
+            return None
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires = time.time() + timeout if timeout else 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(expires, f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._prune()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def _prune(self):
+        # Drop expired entries, then the least recently written ones over the limit
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with open(path, 'rb') as f:
+                    expires = pickle.load(f)
+                if expires and expires < now:
+                    os.remove(path)
+                else:
+                    entries.append((os.path.getmtime(path), path))
+            except (OSError, EOFError, pickle.PickleError):
+                continue
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def make_cache(config):
+    """Build the backend named by CACHE_TYPE: 'memory', 'filesystem' or 'null'"""
+    timeout = config.get('CACHE_DEFAULT_TIMEOUT', 300)
+    return make_backend(config, 'CACHE_TYPE', {
+        'memory': lambda: MemoryCache(config.get('CACHE_MAX_ENTRIES', 1000), timeout),
+        'filesystem': lambda: FileSystemCache(config['CACHE_DIR'], config.get('CACHE_MAX_ENTRIES', 5000), timeout),
+        'null': NullCache,
+    })
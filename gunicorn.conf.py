@@ -0,0 +1,95 @@
+"""gunicorn settings; gunicorn reads this file from the working directory by itself.
+
+    gunicorn                                    # uvicorn workers running asgi.py, see below
+    TECHFIX_SERVER=gthread gunicorn             # threaded WSGI workers
+    TECHFIX_WORKERS=4 TECHFIX_THREADS=16 gunicorn -c gunicorn.conf.py
+
+TECHFIX_SERVER picks how a worker process serves concurrent connections:
+
+  sync     one request at a time per process, like a bare `gunicorn Blog:app`.
+           Every slow client, SQLite write or upload holds a whole process.
+  gthread  TECHFIX_THREADS threads per process. SQLite, file and socket I/O
+           all release the GIL, so a thread waiting on them leaves the others
+           running, and idle keep-alive connections wait without a thread. A
+           client still sending its request does hold one, though, so slow
+           clients need a buffering proxy (nginx) in front.
+  asgi     (default) uvicorn workers: an asyncio event loop per process takes
+           in requests however slowly they arrive, then runs each on a pool of
+           TECHFIX_THREADS threads (see asgi.py). The mode for many concurrent
+           connections per box, and the only one serving live updates on
+           problem pages: each open page keeps an event stream open, which
+           would hold a sync or gthread worker thread for good.
+
+gevent/eventlet workers are not offered: the sqlite3 module blocks inside C
+code that monkey-patching cannot reach, so one slow query would stall every
+connection of the worker.
+
+Tuning:
+
+  TECHFIX_WORKERS   processes; default 2 x CPUs + 1. Python runs one thread at a
+                    time per process, so CPU-bound pages (rendering, search)
+                    only scale with processes. With more than one, the page
+                    cache, login throttle, live updates and /metrics default
+                    to backends all workers share (TECHFIX_CACHE=filesystem,
+                    TECHFIX_RATELIMIT=sqlite, TECHFIX_LIVE=sqlite,
+                    TECHFIX_METRICS=sqlite), and asking for the per-process
+                    'memory' ones is refused: each worker would invalidate
+                    only its own cached pages and count only its own share
+                    of login attempts.
+  TECHFIX_THREADS   concurrent requests per process; default 8. Raise it while
+                    requests mostly wait on I/O, lower it if p95 latency grows
+                    with load. The database pool is sized to match
+                    (TECHFIX_DB_POOL_SIZE), so no request waits for a connection.
+                    SQLite takes one writer at a time whatever the thread count;
+                    run with TECHFIX_DB_PROFILE=production so writers queue on
+                    busy_timeout in WAL mode instead of blocking readers.
+  TECHFIX_BIND      listen address; default 127.0.0.1:8000.
+  TECHFIX_PROXY_HOPS  reverse proxies in front (e.g. 1 behind nginx), so login
+                    throttling goes by the client's address rather than the
+                    proxy's; default 0.
+  TECHFIX_TIMEOUT   seconds before a stuck worker is restarted; default 30.
+
+The app is loaded once before forking (preload_app): create_app() opens no
+database connections or files, so nothing is shared between workers by mistake.
+Compare the modes on your own box with
+`python benchmark.py run --gunicorn --server sync,gthread,asgi --concurrency 64`.
+"""
+import multiprocessing
+import os
+
+server = os.environ.get('TECHFIX_SERVER', 'asgi')
+
+bind = os.environ.get('TECHFIX_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('TECHFIX_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('TECHFIX_THREADS', 8))
+timeout = int(os.environ.get('TECHFIX_TIMEOUT', 30))
+graceful_timeout = timeout
+keepalive = 5
+preload_app = True
+
+if server == 'sync':
+    worker_class = 'sync'
+    wsgi_app = 'Blog:app'
+    threads = 1     # more than one would silently switch gunicorn to gthread
+elif server == 'gthread':
+    worker_class = 'gthread'
+    wsgi_app = 'Blog:app'
+    worker_connections = 1000   # open connections per process, most of them idle keep-alives
+elif server == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'asgi:application'
+    os.environ.setdefault('TECHFIX_ASGI_THREADS', str(threads))
+else:
+    raise RuntimeError(f'Unknown TECHFIX_SERVER: {server} (use sync, gthread or asgi)')
+
+# One database connection per thread that may need one
+os.environ.setdefault('TECHFIX_DB_POOL_SIZE', str(threads))
+# State every worker must see: cached pages a write invalidates, login attempts, live update
+# events and /metrics counts
+SHARED_BACKENDS = {'TECHFIX_CACHE': 'filesystem', 'TECHFIX_RATELIMIT': 'sqlite', 'TECHFIX_LIVE': 'sqlite',
+                   'TECHFIX_METRICS': 'sqlite'}
+if workers > 1:
+    for name, shared in SHARED_BACKENDS.items():
+        if os.environ.setdefault(name, shared) == 'memory':
+            raise RuntimeError(f'{name}=memory keeps state per process; use {name}={shared} '
+                               f'with {workers} workers, or TECHFIX_WORKERS=1')
@@ -0,0 +1,96 @@
+"""Profile picture storage.
+
+Originals are content-addressed (`<sha256>.<ext>`), so re-uploading the same
+image stores nothing new. Small WebP thumbnails are rendered from them in a
+background job and pages link to those instead of the original.
+"""
+import hashlib
+import os
+import tempfile
+import time
+
+from PIL import Image, ImageOps
+
+THUMBNAIL_SIZES = (64, 150, 300)
+FORMAT_EXTENSIONS = {'PNG': 'png', 'JPEG': 'jpg', 'GIF': 'gif', 'WEBP': 'webp'}
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def thumbnail_name(filename, size):
+    return f"thumbs/{filename.split('.')[0]}_{size}.webp"
+
+
+def store_upload(stream, folder, chunk_size=64 * 1024):
+    """Stream an upload to disk while hashing it; returns the stored file name"""
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        try:
+            with Image.open(tmp_path) as image:
+                image.verify()
+                extension = FORMAT_EXTENSIONS.get(image.format)
+        except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+            raise InvalidImage(str(e)) from e
+        if extension is None:
+            raise InvalidImage('Unsupported image format')
+
+        filename = f'{digest.hexdigest()}.{extension}'
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            os.utime(path)     # keep it out of garbage collection's grace window
+        else:
+            os.replace(tmp_path, path)
+        return filename
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def make_thumbnails(folder, filename, sizes=THUMBNAIL_SIZES, quality=80):
+    """Render square WebP thumbnails of a stored original (existing ones are kept)"""
+    os.makedirs(os.path.join(folder, 'thumbs'), exist_ok=True)
+    missing = [size for size in sizes
+               if not os.path.exists(os.path.join(folder, thumbnail_name(filename, size)))]
+    if not missing:
+        return
+    with Image.open(os.path.join(folder, filename)) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        for size in missing:
+            thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            path = os.path.join(folder, thumbnail_name(filename, size))
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.thumb-')
+            with os.fdopen(fd, 'wb') as out:
+                thumb.save(out, 'WEBP', quality=quality, method=4)
+            os.replace(tmp_path, path)
+
+
+def collect_garbage(folder, referenced, grace_period=3600):
+    """Delete originals and thumbnails not in `referenced`; returns the number removed.
+
+    Files younger than `grace_period` seconds are kept so an upload whose
+    database update has not committed yet is never removed.
+    """
+    keep = {name.split('.')[0] for name in referenced if name}
+    cutoff = time.time() - grace_period
+    removed = 0
+    for directory in (folder, os.path.join(folder, 'thumbs')):
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path) or os.path.getmtime(path) > cutoff:
+                continue
+            digest = name.split('.')[0].rsplit('_', 1)[0] if directory != folder else name.split('.')[0]
+            if digest not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
@@ -0,0 +1,300 @@
+"""Request timing, SQL and template instrumentation, profiling and /metrics.
+
+Every request is timed, along with the SQL statements and templates it ran;
+the totals go out in a Server-Timing header and into Prometheus-style
+histograms served from /metrics.
+
+With METRICS_BACKEND 'memory' the metrics are per process and carry a `pid`
+label, so scraping one worker of several shows only its share. 'sqlite' adds
+every worker's counts into one small file on the host (each worker flushes
+every few seconds), so any worker answers /metrics with the totals of all.
+
+/metrics answers requests from the host itself (not relayed by a proxy) and
+requests sending `Authorization: Bearer <METRICS_TOKEN>`; others get a 404.
+
+A request is profiled with cProfile (or pyinstrument, when installed and
+selected) when it sends `X-Profile: <PROFILE_TOKEN>`, or at random with
+probability PROFILE_SAMPLE_RATE. Profiles are written to PROFILE_DIR.
+"""
+import atexit
+import cProfile
+import hmac
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, abort, before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+from backends import ProcessThread, SQLiteFile, make_backend
+
+try:
+    import pyinstrument
+except ImportError:  # cProfile is always available
+    pyinstrument = None
+
+log = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Exposed in this order: name -> (type, help)
+METRICS = {
+    'techfix_request_duration_seconds': ('histogram', 'Time spent handling requests.'),
+    'techfix_request_queries': ('histogram', 'SQL statements executed per request.'),
+    'techfix_requests_total': ('counter', 'Requests handled, by response status.'),
+    'techfix_sql_seconds_total': ('counter', 'Time spent in SQL statements, by endpoint.'),
+    'techfix_template_seconds_total': ('counter', 'Time spent rendering each template.'),
+    'techfix_slow_queries_total': ('counter', 'SQL statements slower than SLOW_QUERY_THRESHOLD.'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    metric TEXT NOT NULL,
+    series TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (metric, series)
+);
+"""
+
+
+def format_labels(names, values):
+    return ','.join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+
+
+def series_key(name, labels):
+    return f'{name}{{{labels}}}' if labels else name
+
+
+def observe(deltas, name, buckets, labels, value):
+    """Add one histogram observation to `deltas`, as Prometheus' cumulative buckets"""
+    for bound in buckets + ('+Inf',):
+        le = f'le="{bound}"'
+        deltas[name, series_key(f'{name}_bucket', f'{labels},{le}' if labels else le)] += \
+            bound == '+Inf' or value <= bound
+    deltas[name, series_key(f'{name}_sum', labels)] += value
+    deltas[name, series_key(f'{name}_count', labels)] += 1
+
+
+class MemoryMetrics:
+    """Totals of this process only"""
+
+    def __init__(self):
+        self._totals = defaultdict(float)   # (metric, series) -> value, in order of first appearance
+        self._lock = threading.Lock()
+
+    def add(self, deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._totals[key] += value
+
+    def totals(self):
+        """[(metric, series, value)], each series labelled with this process's pid"""
+        pid = f'pid="{os.getpid()}"'
+        with self._lock:
+            return [(metric, series[:-1] + f',{pid}}}' if series.endswith('}') else f'{series}{{{pid}}}', value)
+                    for (metric, series), value in self._totals.items()]
+
+
+class SQLiteMetrics:
+    """Totals of every process on the host, summed in a SQLite file.
+
+    Each process collects its own increments and adds them to the file from a
+    background thread every `flush_interval` seconds, whenever the totals are
+    read, and at exit.
+    """
+
+    def __init__(self, path, flush_interval=5):
+        self.db = SQLiteFile(path, SCHEMA)
+        self.flush_interval = flush_interval
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+        self._flusher = ProcessThread(self._run, 'metrics-flush')
+        atexit.register(self.flush)
+
+    def add(self, deltas):
+        with self._lock:
+            if self._flusher.start():
+                self._pending.clear()   # a forked worker's copy of its parent's increments
+            for key, value in deltas.items():
+                self._pending[key] += value
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+        if not pending:
+            return
+        try:
+            with self.db.transaction() as conn:
+                conn.executemany(
+                    'INSERT INTO series (metric, series, value) VALUES (?, ?, ?) '
+                    'ON CONFLICT (metric, series) DO UPDATE SET value = value + excluded.value',
+                    [(metric, series, value) for (metric, series), value in pending.items()])
+        except sqlite3.Error:
+            log.exception('Could not write metrics to %s', self.db.path)
+            self.add(pending)   # keep them for the next flush
+
+    def totals(self):
+        self.flush()
+        return self.db.connection().execute('SELECT metric, series, value FROM series ORDER BY rowid').fetchall()
+
+
+def make_metrics(config):
+    """Build the backend named by METRICS_BACKEND: 'memory' or 'sqlite'"""
+    return make_backend(config, 'METRICS_BACKEND', {
+        'memory': MemoryMetrics,
+        'sqlite': lambda: SQLiteMetrics(config['METRICS_DATABASE']),
+    })
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else f'{value:.6f}'
+
+
+class Instrumentation:
+    def __init__(self, app, metrics_url='/metrics'):
+        self.app = app
+        self.store = make_metrics(app.config)
+
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.teardown_request(self.stop_profiler)
+        app.add_url_rule(metrics_url, 'metrics', self.metrics)
+        before_render_template.connect(self.before_render, app)
+        template_rendered.connect(self.after_render, app)
+
+    # ---- requests ----
+    def start_request(self):
+        g.instrumentation = {'start': time.perf_counter(), 'queries': 0, 'sql': 0.0, 'templates': 0.0}
+        if self.should_profile():
+            self.start_profiler()
+
+    def should_profile(self):
+        token = self.app.config.get('PROFILE_TOKEN')
+        if token and request.headers.get('X-Profile') == token:
+            return True
+        rate = self.app.config.get('PROFILE_SAMPLE_RATE', 0)
+        return rate > 0 and random.random() < rate
+
+    def finish_request(self, response):
+        stats = g.pop('instrumentation', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats['start']
+        endpoint = request.endpoint or 'unmatched'
+        labels = format_labels(('method', 'endpoint'), (request.method, endpoint))
+        deltas = defaultdict(float)
+        observe(deltas, 'techfix_request_duration_seconds', DURATION_BUCKETS, labels, elapsed)
+        observe(deltas, 'techfix_request_queries', QUERY_BUCKETS, labels, stats['queries'])
+        deltas['techfix_requests_total', series_key('techfix_requests_total', format_labels(
+            ('method', 'endpoint', 'status'), (request.method, endpoint, response.status_code)))] += 1
+        deltas['techfix_sql_seconds_total', series_key('techfix_sql_seconds_total', format_labels(
+            ('endpoint',), (endpoint,)))] += stats['sql']
+        for name, seconds in stats.get('per_template', {}).items():
+            deltas['techfix_template_seconds_total', series_key('techfix_template_seconds_total', format_labels(
+                ('template',), (name,)))] += seconds
+        self.store.add(deltas)
+
+        response.headers['Server-Timing'] = (
+            f"app;dur={elapsed * 1000:.1f}, db;dur={stats['sql'] * 1000:.1f};desc=\"{stats['queries']} queries\", "
+            f"tpl;dur={stats['templates'] * 1000:.1f}")
+        if elapsed >= self.app.config.get('SLOW_REQUEST_THRESHOLD', 1.0):
+            log.warning('Slow request %s %s: %.0fms, %d queries (%.0fms), templates %.0fms',
+                        request.method, request.full_path, elapsed * 1000, stats['queries'],
+                        stats['sql'] * 1000, stats['templates'] * 1000)
+        return response
+
+    # ---- SQL ----
+    def watch(self, engine):
+        """Time the statements run through `engine` (call once per engine of the app)"""
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self.after_cursor_execute)
+        event.listen(engine, 'handle_error', self.query_failed)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        if has_request_context() and 'instrumentation' in g:
+            g.instrumentation['queries'] += 1
+            g.instrumentation['sql'] += elapsed
+        if elapsed >= self.app.config.get('SLOW_QUERY_THRESHOLD', 0.1):
+            self.store.add({('techfix_slow_queries_total', 'techfix_slow_queries_total'): 1})
+            log.warning('Slow query (%.0fms): %s', elapsed * 1000, ' '.join(statement.split())[:500])
+
+    def query_failed(self, context):
+        if context.connection is not None and context.connection.info.get('query_start'):
+            context.connection.info['query_start'].pop()
+
+    # ---- templates ----
+    def before_render(self, sender, template, context, **extra):
+        if has_request_context() and 'instrumentation' in g:
+            g.instrumentation.setdefault('rendering', []).append(time.perf_counter())
+
+    def after_render(self, sender, template, context, **extra):
+        if has_request_context() and g.get('instrumentation', {}).get('rendering'):
+            stats = g.instrumentation
+            elapsed = time.perf_counter() - stats['rendering'].pop()
+            if not stats['rendering']:        # a nested render is already inside the outer one
+                stats['templates'] += elapsed
+            per_template = stats.setdefault('per_template', {})
+            per_template[template.name] = per_template.get(template.name, 0.0) + elapsed
+
+    # ---- profiling ----
+    def start_profiler(self):
+        if self.app.config.get('PROFILER') == 'pyinstrument' and pyinstrument is not None:
+            profiler = pyinstrument.Profiler()
+        else:
+            profiler = cProfile.Profile()
+        if isinstance(profiler, cProfile.Profile):
+            profiler.enable()
+        else:
+            profiler.start()
+        g.profiler = profiler
+
+    def stop_profiler(self, exc=None):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return
+        folder = self.app.config['PROFILE_DIR']
+        os.makedirs(folder, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{request.endpoint or 'unmatched'}"
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = os.path.join(folder, name + '.prof')
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = os.path.join(folder, name + '.html')
+            with open(path, 'w') as f:
+                f.write(profiler.output_html())
+        log.info('Profile of %s %s written to %s', request.method, request.path, path)
+
+    # ---- exposition ----
+    def allowed_to_scrape(self):
+        token = self.app.config.get('METRICS_TOKEN')
+        if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return True
+        # A local reverse proxy would make every visitor look local, but it says who they are
+        return request.remote_addr in ('127.0.0.1', '::1') and 'X-Forwarded-For' not in request.headers
+
+    def metrics(self):
+        if not self.allowed_to_scrape():
+            abort(404)
+        by_metric = defaultdict(list)
+        for metric, series, value in self.store.totals():
+            by_metric[metric].append(f'{series} {format_value(value)}')
+        lines = []
+        for metric, (kind, description) in METRICS.items():
+            lines += [f'# HELP {metric} {description}', f'# TYPE {metric} {kind}', *by_metric[metric]]
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
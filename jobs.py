@@ -0,0 +1,188 @@
+"""Persistent background job queue.
+
+Jobs are rows in their own SQLite file, so queue traffic never competes for
+the application database's write lock. Requests only enqueue; a worker
+(`flask jobs-worker`) claims due jobs, runs their registered handler in a
+thread pool and retries failures with exponential backoff.
+
+Only one job per dedupe key can be pending. A job that goes back to pending
+(for a retry, or after its worker died) while a newer twin is queued is
+folded into that twin and marked 'superseded' instead.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+
+from backends import SQLiteFile
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedupe_key TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    locked_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status_run_at ON jobs (status, run_at);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_jobs_pending_dedupe_key ON jobs (dedupe_key) WHERE status = 'pending';
+"""
+
+
+class JobQueue:
+    def __init__(self, path, max_attempts=5, backoff=30, lock_timeout=600, eager=False, handlers=None,
+                 mergers=None):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff              # seconds before the first retry, doubled on each attempt
+        self.lock_timeout = lock_timeout    # running jobs older than this are assumed orphaned
+        self.eager = eager                  # run jobs inline at enqueue time (development/tests)
+        self.handlers = {} if handlers is None else handlers   # name -> function(payload)
+        self.mergers = {} if mergers is None else mergers       # name -> merge(pending, new), see enqueue()
+        self.db = SQLiteFile(path, SCHEMA, timeout=30, synchronous='FULL', row_factory=sqlite3.Row)
+
+    def _transaction(self, fn):
+        with self.db.transaction() as conn:
+            return fn(conn)
+
+    def enqueue(self, name, payload=None, delay=0, dedupe_key=None, merge=None):
+        """Queue a job to run after `delay` seconds.
+
+        While a job with the same `dedupe_key` is still pending, no new job is
+        created; `merge(old_payload, new_payload)` folds the new payload into
+        it instead (by default the merger registered for `name`, or else the new
+        payload replaces the old one).
+        """
+        payload = payload or {}
+        merge = merge or self.mergers.get(name)
+        if self.eager:
+            self.handlers[name](payload)
+            return
+
+        def insert_or_merge(conn):
+            now = time.time()
+            existing = None
+            if dedupe_key is not None:
+                existing = conn.execute(
+                    "SELECT id, payload FROM jobs WHERE dedupe_key = ? AND status = 'pending'", (dedupe_key,)
+                ).fetchone()
+            if existing:
+                merged = merge(json.loads(existing['payload']), payload) if merge else payload
+                conn.execute('UPDATE jobs SET payload = ? WHERE id = ?', (json.dumps(merged), existing['id']))
+            else:
+                conn.execute(
+                    'INSERT INTO jobs (name, payload, dedupe_key, run_at, created_at) VALUES (?, ?, ?, ?, ?)',
+                    (name, json.dumps(payload), dedupe_key, now + delay, now))
+
+        self._transaction(insert_or_merge)
+
+    def _requeue(self, conn, job, **columns):
+        """Put a claimed job back to 'pending' with `columns` updated.
+
+        If a job with the same dedupe key was queued meanwhile, this one's
+        payload is merged into it and this one is marked 'superseded'.
+        """
+        twin = None
+        if job['dedupe_key'] is not None:
+            twin = conn.execute("SELECT id, payload FROM jobs WHERE dedupe_key = ? AND status = 'pending'",
+                                (job['dedupe_key'],)).fetchone()
+        status = 'pending'
+        if twin is not None:
+            merge = self.mergers.get(job['name'])
+            if merge:
+                # The twin was queued later, so its payload is the newer one
+                merged = merge(json.loads(job['payload']), json.loads(twin['payload']))
+                conn.execute('UPDATE jobs SET payload = ? WHERE id = ?', (json.dumps(merged), twin['id']))
+            status = 'superseded'
+        assignments = ''.join(f', {column} = ?' for column in columns)
+        conn.execute(f'UPDATE jobs SET status = ?{assignments} WHERE id = ?',
+                     (status, *columns.values(), job['id']))
+
+    def claim(self):
+        """Atomically take the next due job, or return None"""
+        def take(conn):
+            now = time.time()
+            orphaned = conn.execute("SELECT * FROM jobs WHERE status = 'running' AND locked_at < ?",
+                                    (now - self.lock_timeout,)).fetchall()
+            for job in orphaned:
+                self._requeue(conn, job)
+            job = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' AND run_at <= ? ORDER BY run_at, id LIMIT 1", (now,)
+            ).fetchone()
+            if job is not None:
+                conn.execute("UPDATE jobs SET status = 'running', locked_at = ?, attempts = attempts + 1 "
+                             "WHERE id = ?", (now, job['id']))
+            return job
+
+        return self._transaction(take)
+
+    def run(self, job):
+        attempts = job['attempts'] + 1
+        try:
+            self.handlers[job['name']](json.loads(job['payload']))
+        except Exception as e:
+            log.exception('Job %s (%s) failed on attempt %d', job['id'], job['name'], attempts)
+            if attempts >= self.max_attempts:
+                self._transaction(lambda conn: conn.execute(
+                    "UPDATE jobs SET status = 'failed', last_error = ? WHERE id = ?", (repr(e), job['id'])))
+            else:
+                retry_at = time.time() + self.backoff * 2 ** (attempts - 1)
+                self._transaction(lambda conn: self._requeue(conn, job, run_at=retry_at, last_error=repr(e)))
+        else:
+            self._transaction(lambda conn: conn.execute(
+                "UPDATE jobs SET status = 'done', last_error = NULL WHERE id = ?", (job['id'],)))
+
+    def work(self, threads=4, poll_interval=1.0, context=None, burst=False, stop_event=None):
+        """Process jobs with a pool of `threads` until stopped.
+
+        `context` is a callable returning a context manager entered around each
+        job (e.g. `app.app_context`). With `burst`, return once no job is due.
+        """
+        stop_event = stop_event or threading.Event()
+        slots = threading.Semaphore(threads)
+
+        def run_in_context(job):
+            try:
+                with (context() if context else nullcontext()):
+                    self.run(job)
+            finally:
+                slots.release()
+
+        def report(job, future):
+            # run() handles the job's own errors; this catches the rest (context setup, a locked queue)
+            error = future.exception()
+            if error is not None:
+                log.error('Worker thread failed running job %s (%s)', job['id'], job['name'], exc_info=error)
+
+        with ThreadPoolExecutor(threads, thread_name_prefix='job') as pool:
+            while not stop_event.is_set():
+                slots.acquire()
+                job = self.claim()
+                if job is None:
+                    slots.release()
+                    if burst:
+                        break
+                    stop_event.wait(poll_interval)
+                    continue
+                pool.submit(run_in_context, job).add_done_callback(partial(report, job))
+
+    def stats(self):
+        rows = self.db.connection().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
+
+    def prune(self, older_than=7 * 24 * 3600):
+        """Delete finished and superseded jobs created more than `older_than` seconds ago"""
+        cutoff = time.time() - older_than
+        return self._transaction(lambda conn: conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'superseded') AND created_at < ?", (cutoff,)).rowcount)
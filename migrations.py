@@ -0,0 +1,347 @@
+"""Versioned schema migrations for the SQLite database.
+
+db.create_all() only creates missing tables, so everything else an existing
+database needs (triggers, indexes, the search index, new columns) is applied
+here in order. The schema version is kept in SQLite's PRAGMA user_version.
+Every migration must also be safe on a fresh database built by create_all().
+"""
+from sqlalchemy.exc import OperationalError
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def get_version(conn):
+    return conn.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def upgrade(engine):
+    """Apply pending migrations, each in its own transaction; returns those applied"""
+    with engine.connect() as conn:
+        version = get_version(conn)
+    applied = []
+    for number, description, fn in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            conn.exec_driver_sql(f'PRAGMA user_version = {number:d}')
+        applied.append((number, description))
+    return applied
+
+
+def run_all(conn, statements):
+    for statement in statements:
+        conn.exec_driver_sql(statement)
+
+
+def has_table(conn, name):
+    return conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).first() is not None
+
+
+def has_column(conn, table, name):
+    # table_xinfo, unlike table_info, also lists generated columns
+    return any(row[1] == name for row in conn.exec_driver_sql(f'PRAGMA table_xinfo({table})'))
+
+
+def add_column(conn, table, name, ddl):
+    """ALTER TABLE ADD COLUMN unless create_all() already made it"""
+    if not has_column(conn, table, name):
+        conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}')
+
+
+# ==================== SEARCH INDEX ====================
+# Two FTS5 indexes: problem_search over problem title/description (rowid mirrors
+# problems.id) and solution_search over each solution's title and steps (rowid
+# mirrors solutions.id). Triggers keep both in sync one row at a time, so a
+# write never touches more than the row it changes; search results are
+# aggregated per problem at query time (see techfix/database.py).
+SEARCH_INDEX_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS problem_search USING fts5(
+        title, description,
+        tokenize = 'porter unicode61', prefix = '2 3'
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS solution_search USING fts5(
+        title, steps, problem_id UNINDEXED,
+        tokenize = 'porter unicode61', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS problems_search_ai AFTER INSERT ON problems BEGIN
+        INSERT INTO problem_search (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS problems_search_au AFTER UPDATE OF title, description ON problems BEGIN
+        UPDATE problem_search SET title = new.title, description = new.description
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS problems_search_ad AFTER DELETE ON problems BEGIN
+        DELETE FROM problem_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS solutions_search_ai AFTER INSERT ON solutions BEGIN
+        INSERT INTO solution_search (rowid, title, steps, problem_id)
+        VALUES (new.id, new.title, new.steps, new.problem_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS solutions_search_au AFTER UPDATE OF title, steps, problem_id ON solutions BEGIN
+        UPDATE solution_search SET title = new.title, steps = new.steps, problem_id = new.problem_id
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS solutions_search_ad AFTER DELETE ON solutions BEGIN
+        DELETE FROM solution_search WHERE rowid = old.id;
+    END""",
+]
+
+SEARCH_TRIGGERS = [
+    'problems_search_ai', 'problems_search_au', 'problems_search_ad',
+    'solutions_search_ai', 'solutions_search_au', 'solutions_search_ad',
+]
+
+
+def drop_search_triggers(conn):
+    """For bulk loads; SEARCH_INDEX_SCHEMA recreates them"""
+    run_all(conn, [f'DROP TRIGGER IF EXISTS {name}' for name in SEARCH_TRIGGERS])
+
+# Title matches outrank description matches, which outrank solution text
+PROBLEM_SEARCH_RANK = 'bm25(10.0, 5.0)'
+SOLUTION_SEARCH_RANK = 'bm25(1.0, 1.0, 0.0)'
+
+
+def populate_search_index(conn):
+    run_all(conn, [
+        "DELETE FROM problem_search",
+        "DELETE FROM solution_search",
+        "INSERT INTO problem_search (rowid, title, description) SELECT id, title, description FROM problems",
+        "INSERT INTO solution_search (rowid, title, steps, problem_id) "
+        "SELECT id, title, steps, problem_id FROM solutions",
+    ])
+    conn.exec_driver_sql("INSERT INTO problem_search (problem_search, rank) VALUES ('rank', ?)",
+                         (PROBLEM_SEARCH_RANK,))
+    conn.exec_driver_sql("INSERT INTO solution_search (solution_search, rank) VALUES ('rank', ?)",
+                         (SOLUTION_SEARCH_RANK,))
+
+
+# ==================== COUNTERS ====================
+# Solution.upvotes/downvotes are aggregates of the votes table
+VOTE_COUNTER_SCHEMA = [
+    """CREATE TRIGGER IF NOT EXISTS votes_counters_ai AFTER INSERT ON votes BEGIN
+        UPDATE solutions SET upvotes = upvotes + (new.value > 0),
+                             downvotes = downvotes + (new.value < 0)
+        WHERE id = new.solution_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS votes_counters_au AFTER UPDATE OF value ON votes BEGIN
+        UPDATE solutions SET upvotes = upvotes + (new.value > 0) - (old.value > 0),
+                             downvotes = downvotes + (new.value < 0) - (old.value < 0)
+        WHERE id = new.solution_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS votes_counters_ad AFTER DELETE ON votes BEGIN
+        UPDATE solutions SET upvotes = upvotes - (old.value > 0),
+                             downvotes = downvotes - (old.value < 0)
+        WHERE id = old.solution_id;
+    END""",
+]
+
+# problems.solution_count/is_solved follow solutions as they come and go
+SOLUTION_COUNTER_SCHEMA = [
+    """CREATE TRIGGER IF NOT EXISTS solutions_counters_ai AFTER INSERT ON solutions BEGIN
+        UPDATE problems SET solution_count = solution_count + 1, is_solved = 1
+        WHERE id = new.problem_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS solutions_counters_au AFTER UPDATE OF problem_id ON solutions
+    WHEN old.problem_id <> new.problem_id BEGIN
+        UPDATE problems SET solution_count = solution_count - 1, is_solved = solution_count > 1
+        WHERE id = old.problem_id;
+        UPDATE problems SET solution_count = solution_count + 1, is_solved = 1
+        WHERE id = new.problem_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS solutions_counters_ad AFTER DELETE ON solutions BEGIN
+        UPDATE problems SET solution_count = solution_count - 1, is_solved = solution_count > 1
+        WHERE id = old.problem_id;
+    END""",
+]
+
+# Percentage of voters who found a solution helpful; a generated column on solutions
+HELPFUL_SCORE_SQL = ('CASE WHEN upvotes + downvotes > 0 '
+                     'THEN round(upvotes * 100.0 / (upvotes + downvotes), 1) ELSE 0 END')
+
+
+# ==================== REPUTATION ====================
+# Points a solution earns its author. users.reputation and category_reputation
+# hold the per-user and per-(user, category) sums, kept current by triggers.
+SOLUTION_POINTS_SQL = '({s}.upvotes * 10 - {s}.downvotes * 2 + coalesce({s}.is_verified, 0) * 15)'
+
+
+def solution_points(alias):
+    return SOLUTION_POINTS_SQL.format(s=alias)
+
+
+def reputation_change(user_id, problem_id, points):
+    """Trigger body adding `points` to a user's total and their total in the problem's category"""
+    return f"""
+        UPDATE users SET reputation = coalesce(reputation, 0) + {points} WHERE id = {user_id};
+        INSERT INTO category_reputation (user_id, category, reputation)
+        SELECT {user_id}, coalesce(category, ''), {points} FROM problems WHERE id = {problem_id}
+        ON CONFLICT (user_id, category) DO UPDATE SET reputation = reputation + excluded.reputation;"""
+
+
+REPUTATION_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS category_reputation (
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        category VARCHAR(50) NOT NULL,
+        reputation INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, category)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_category_reputation_category "
+    "ON category_reputation (category, reputation, user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_users_reputation ON users (reputation, id)",
+    f"""CREATE TRIGGER IF NOT EXISTS solutions_reputation_ai AFTER INSERT ON solutions BEGIN
+        {reputation_change('new.user_id', 'new.problem_id', solution_points('new'))}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS solutions_reputation_au AFTER UPDATE OF upvotes, downvotes, is_verified
+    ON solutions WHEN {solution_points('new')} <> {solution_points('old')} BEGIN
+        {reputation_change('new.user_id', 'new.problem_id',
+                           f"({solution_points('new')} - {solution_points('old')})")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS solutions_reputation_ad AFTER DELETE ON solutions BEGIN
+        {reputation_change('old.user_id', 'old.problem_id', f"-{solution_points('old')}")}
+    END""",
+]
+
+
+def recompute_reputation(conn):
+    """Rebuild every user's totals from their solutions in set-based statements"""
+    run_all(conn, [
+        f"""UPDATE users SET reputation = coalesce(
+            (SELECT sum({solution_points('s')}) FROM solutions s WHERE s.user_id = users.id), 0)""",
+        "DELETE FROM category_reputation",
+        f"""INSERT INTO category_reputation (user_id, category, reputation)
+            SELECT s.user_id, coalesce(p.category, ''), sum({solution_points('s')})
+            FROM solutions s JOIN problems p ON p.id = s.problem_id
+            GROUP BY s.user_id, coalesce(p.category, '')""",
+    ])
+
+
+# ==================== CHANGE TRACKING ====================
+# updated_at moves whenever a row's API representation does (see techfix/api.py),
+# including counters the triggers above maintain behind the ORM's back. View
+# counts are deliberately left out: they change constantly and matter little.
+NOW_SQL = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"  # the format SQLAlchemy stores DateTime in
+
+
+def touch_trigger(table, columns):
+    changed = ' OR '.join(f'old.{c} IS NOT new.{c}' for c in columns)
+    return f"""CREATE TRIGGER IF NOT EXISTS {table}_touch_au AFTER UPDATE OF {', '.join(columns)} ON {table}
+    WHEN {changed} BEGIN
+        UPDATE {table} SET updated_at = {NOW_SQL} WHERE id = new.id;
+    END"""
+
+
+CHANGE_TRACKING_SCHEMA = [
+    touch_trigger('problems', ('solution_count', 'is_solved')),
+    touch_trigger('solutions', ('upvotes', 'downvotes', 'is_verified')),
+    touch_trigger('users', ('reputation',)),
+]
+
+
+# ==================== HISTORY ====================
+@migration(1, 'Vote and solution counter triggers')
+def add_counter_triggers(conn):
+    run_all(conn, VOTE_COUNTER_SCHEMA + SOLUTION_COUNTER_SCHEMA)
+
+
+@migration(2, 'Full-text search index')
+def add_search_index(conn):
+    exists = has_table(conn, 'problem_search')
+    try:
+        run_all(conn, SEARCH_INDEX_SCHEMA)
+    except OperationalError:
+        # SQLite built without FTS5: search falls back to LIKE
+        return
+    if not exists:
+        populate_search_index(conn)
+
+
+@migration(3, 'Indexes for listing queries')
+def add_listing_indexes(conn):
+    run_all(conn, [
+        "CREATE INDEX IF NOT EXISTS ix_problems_created_at ON problems (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_problems_views ON problems (views, id)",
+        "CREATE INDEX IF NOT EXISTS ix_problems_solution_count ON problems (solution_count, id)",
+        "CREATE INDEX IF NOT EXISTS ix_problems_is_solved_created_at ON problems (is_solved, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_problems_category_created_at ON problems (category, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_problems_category_views ON problems (category, views, id)",
+        "CREATE INDEX IF NOT EXISTS ix_problems_category_solution_count ON problems (category, solution_count, id)",
+        "CREATE INDEX IF NOT EXISTS ix_problems_user_id_created_at ON problems (user_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_solutions_problem_id_created_at ON solutions (problem_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_solutions_user_id ON solutions (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_votes_solution_id ON votes (solution_id)",
+    ])
+
+
+@migration(4, 'User profile pictures')
+def add_profile_pic(conn):
+    add_column(conn, 'users', 'profile_pic', 'VARCHAR(80)')
+
+
+@migration(5, 'Parsed solution steps and stored helpful score')
+def add_solution_render_columns(conn):
+    # parsed_steps is backfilled by the app, which owns the parser
+    add_column(conn, 'solutions', 'parsed_steps', 'JSON')
+    add_column(conn, 'solutions', 'helpful_score', f'FLOAT GENERATED ALWAYS AS ({HELPFUL_SCORE_SQL}) VIRTUAL')
+
+
+@migration(6, 'Reputation totals and leaderboards')
+def add_reputation(conn):
+    run_all(conn, REPUTATION_SCHEMA)
+    recompute_reputation(conn)
+
+
+@migration(7, 'Change tracking for the JSON API')
+def add_change_tracking(conn):
+    add_column(conn, 'solutions', 'updated_at', 'DATETIME')
+    add_column(conn, 'users', 'updated_at', 'DATETIME')
+    run_all(conn, [f'UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL'
+                   for table in ('problems', 'solutions', 'users')])
+    run_all(conn, CHANGE_TRACKING_SCHEMA)
+
+
+@migration(8, 'Indexes for unsolved problems by category and profile categories')
+def add_category_indexes(conn):
+    run_all(conn, [
+        "CREATE INDEX IF NOT EXISTS ix_problems_category_is_solved_created_at"
+        " ON problems (category, is_solved, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_category_reputation_user_id ON category_reputation (user_id, reputation, category)",
+    ])
+    # Migration 3 used to ANALYZE, recording the row counts of whatever database it ran on, often an
+    # empty one; such stale statistics lead the planner astray. Fresh ones come from PRAGMA optimize
+    # as connections close, or from `flask db-analyze`.
+    if has_table(conn, 'sqlite_stat1'):
+        conn.exec_driver_sql('DELETE FROM sqlite_stat1')
+
+
+@migration(9, 'Per-solution search index')
+def split_search_index(conn):
+    # problem_search used to carry a problem's solutions concatenated into one column,
+    # rewritten in full whenever any of them changed
+    if not has_table(conn, 'problem_search'):
+        return  # no FTS5; search uses LIKE
+    drop_search_triggers(conn)
+    run_all(conn, ['DROP TABLE problem_search', 'DROP TABLE IF EXISTS solution_search'])
+    run_all(conn, SEARCH_INDEX_SCHEMA)
+    populate_search_index(conn)
+
+
+@migration(10, 'Index for recently changed problems')
+def add_problem_updated_at_index(conn):
+    # The related-problems index of every worker polls for problems changed since its last sync
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_problems_updated_at ON problems (updated_at)")
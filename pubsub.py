@@ -0,0 +1,232 @@
+"""Publish/subscribe for live page updates.
+
+Publishers send a small JSON string on a named channel (say `problem:42`);
+every subscriber to that channel gets it as an Event with an increasing id, so
+a client that reconnects can say which event it saw last and catch up on the
+ones it missed.
+
+'memory' delivers within one process. 'sqlite' appends events to a small log
+file shared by every worker on the host; each process tails it from one
+background thread (only while it has subscribers) and hands new rows to its
+own subscribers, so an event published by any worker reaches them all.
+"""
+import itertools
+import random
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+
+from backends import ProcessThread, SQLiteFile, make_backend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_events_channel_id ON events (channel, id);
+"""
+
+Event = namedtuple('Event', 'id channel data')
+
+
+class Subscription:
+    """Events for one channel, buffered until the subscriber takes them.
+
+    A subscriber that falls more than `max_pending` events behind is marked
+    `overflowed` and should go away; its client reconnects and catches up.
+    `wakeup`, if given, is called (from the publishing thread) after each
+    delivery, for subscribers waiting in an event loop rather than in get().
+    """
+
+    def __init__(self, broker, channel, max_pending=100, wakeup=None):
+        self.broker = broker
+        self.channel = channel
+        self.max_pending = max_pending
+        self.wakeup = wakeup
+        self.overflowed = False
+        self.last_id = 0
+        self._pending = deque()
+        self._held = None       # live events parked while a replay is loaded
+        self._cond = threading.Condition()
+
+    def deliver(self, event):
+        with self._cond:
+            if self._held is not None:
+                self._held.append(event)
+                return
+            self._push(event)
+        if self.wakeup:
+            self.wakeup()
+
+    def _push(self, event):
+        if event.id <= self.last_id:
+            return      # both replayed and delivered live
+        self.last_id = event.id
+        if len(self._pending) >= self.max_pending:
+            self.overflowed = True
+        else:
+            self._pending.append(event)
+        self._cond.notify()
+
+    def hold(self):
+        with self._cond:
+            self._held = []
+
+    def release(self, replayed):
+        """Deliver `replayed` events, then the live ones that came in meanwhile"""
+        with self._cond:
+            held, self._held = self._held, None
+            for event in [*replayed, *held]:
+                self._push(event)
+        if self.wakeup:
+            self.wakeup()
+
+    def get(self, timeout=None):
+        """The next event, or None if there was none within `timeout` seconds"""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            return self._pending.popleft() if self._pending else None
+
+    def drain(self):
+        """Every event delivered so far and not yet taken"""
+        with self._cond:
+            events = list(self._pending)
+            self._pending.clear()
+        return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Broker:
+    """Subscriber bookkeeping shared by the backends"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)    # channel -> subscriptions in this process
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, last_id=None, **options):
+        """Subscribe to `channel`; with `last_id`, events after it are replayed first"""
+        subscription = Subscription(self, channel, **options)
+        if last_id is not None:
+            subscription.hold()
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+            self._subscribed()
+        if last_id is not None:
+            subscription.release(self.history(channel, last_id, subscription.max_pending))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is None:
+                return sum(len(subscribers) for subscribers in self._subscribers.values())
+            return len(self._subscribers.get(channel, ()))
+
+    def _deliver(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event.channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def _subscribed(self):
+        """Called with the lock held whenever someone subscribes"""
+
+
+class MemoryBroker(Broker):
+    """Delivers within this process; remembers the last `history_size` events for replay"""
+
+    def __init__(self, history_size=1000):
+        super().__init__()
+        self._ids = itertools.count(1)
+        self._history = deque(maxlen=history_size)
+        self._publish_lock = threading.Lock()   # delivers events in id order
+
+    def publish(self, channel, data):
+        with self._publish_lock:
+            event = Event(next(self._ids), channel, data)
+            with self._lock:
+                self._history.append(event)
+            self._deliver(event)
+        return event.id
+
+    def history(self, channel, last_id, limit):
+        with self._lock:
+            events = [event for event in self._history if event.channel == channel and event.id > last_id]
+        return events[:limit]
+
+
+class SQLiteBroker(Broker):
+    """Delivers to every process on the host through an event log in `path`"""
+
+    def __init__(self, path, poll_interval=0.2, max_age=600, prune_probability=0.01):
+        super().__init__()
+        self.db = SQLiteFile(path, SCHEMA)
+        self.poll_interval = poll_interval
+        self.max_age = max_age              # seconds events stay available for replay
+        self.prune_probability = prune_probability
+        self._tail = ProcessThread(self._run_tail, 'pubsub-tail')
+
+    def publish(self, channel, data):
+        conn = self.db.connection()
+        now = time.time()
+        event_id = conn.execute('INSERT INTO events (channel, data, created) VALUES (?, ?, ?)',
+                                (channel, data, now)).lastrowid
+        if random.random() < self.prune_probability:
+            conn.execute('DELETE FROM events WHERE created < ?', (now - self.max_age,))
+        return event_id
+
+    def history(self, channel, last_id, limit):
+        rows = self.db.connection().execute(
+            'SELECT id, channel, data FROM events WHERE channel = ? AND id > ? ORDER BY id LIMIT ?',
+            (channel, last_id, limit)).fetchall()
+        return [Event(*row) for row in rows]
+
+    def _subscribed(self):
+        if not self._tail.running():
+            last_id = self.db.connection().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+            self._tail.start(last_id)
+
+    def _run_tail(self, last_id):
+        """Hand rows after `last_id` to this process's subscribers as they come, until it has none left"""
+        conn = self.db.connection()
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._subscribers:
+                    self._tail.stopped()
+                    return
+            try:
+                rows = conn.execute('SELECT id, channel, data FROM events WHERE id > ? ORDER BY id',
+                                    (last_id,)).fetchall()
+            except sqlite3.OperationalError:
+                continue    # locked for longer than the timeout; try again next time
+            for row in rows:
+                last_id = row[0]
+                self._deliver(Event(*row))
+
+
+def make_broker(config):
+    """Build the backend named by LIVE_BACKEND: 'memory' or 'sqlite'"""
+    return make_backend(config, 'LIVE_BACKEND', {
+        'memory': MemoryBroker,
+        'sqlite': lambda: SQLiteBroker(config['LIVE_DATABASE']),
+    })
@@ -0,0 +1,153 @@
+"""Token-bucket rate limiting.
+
+Every key (say `username:alice`) has a bucket of up to `capacity` tokens that
+refills continuously, `capacity` tokens per `period` seconds. Each attempt
+takes a token and is refused while the bucket is empty, so short bursts are
+allowed but the sustained rate is capped.
+
+Buckets live in process memory ('memory') or in a small SQLite file shared by
+every worker on the host ('sqlite'), so the limit holds however requests are
+spread over gunicorn workers.
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from backends import SQLiteFile, make_backend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def refill(tokens, updated, now, capacity, period):
+    return min(capacity, tokens + (now - updated) * capacity / period)
+
+
+def take_token(tokens, capacity, period):
+    """(tokens left, seconds to wait); waiting 0 means the attempt may go ahead"""
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, time_to_token(tokens, capacity, period)
+
+
+def time_to_token(tokens, capacity, period):
+    return max(0, (1 - tokens) * period / capacity)
+
+
+class NullBuckets:
+    """Never limits anything"""
+
+    def take(self, key, capacity, period):
+        return 0
+
+    def peek(self, key, capacity, period):
+        return 0
+
+    def reset(self, key):
+        pass
+
+
+class MemoryBuckets:
+    """Per-process buckets; the least recently used are forgotten past `max_keys`"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()   # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, period):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens, wait = take_token(refill(tokens, updated, now, capacity, period), capacity, period)
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def peek(self, key, capacity, period):
+        """Seconds until `key` has a token, without taking one"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+        return time_to_token(refill(tokens, updated, now, capacity, period), capacity, period)
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class SQLiteBuckets:
+    """Buckets shared by all processes on the host, one row per key"""
+
+    def __init__(self, path, prune_probability=0.01, max_age=86400):
+        # synchronous OFF: losing a bucket only forgives some attempts
+        self.db = SQLiteFile(path, SCHEMA, synchronous='OFF')
+        self.prune_probability = prune_probability
+        self.max_age = max_age          # rows idle this long are full again; drop them
+
+    def take(self, key, capacity, period):
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, wait = take_token(refill(tokens, updated, now, capacity, period), capacity, period)
+            conn.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                         (key, tokens, now))
+            if random.random() < self.prune_probability:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - self.max_age,))
+        return wait
+
+    def peek(self, key, capacity, period):
+        """Seconds until `key` has a token, without taking one"""
+        now = time.time()
+        row = self.db.connection().execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+        tokens, updated = row if row else (capacity, now)
+        return time_to_token(refill(tokens, updated, now, capacity, period), capacity, period)
+
+    def reset(self, key):
+        self.db.connection().execute('DELETE FROM buckets WHERE key = ?', (key,))
+
+
+def make_buckets(config):
+    """Build the backend named by RATELIMIT_BACKEND: 'memory', 'sqlite' or 'null'"""
+    return make_backend(config, 'RATELIMIT_BACKEND', {
+        'memory': MemoryBuckets,
+        'sqlite': lambda: SQLiteBuckets(config['RATELIMIT_DATABASE']),
+        'null': NullBuckets,
+    })
+
+
+class RateLimiter:
+    """Named limits, e.g. {'ip': (20, 60), 'username': (5, 300)}, over one bucket backend"""
+
+    def __init__(self, buckets, limits):
+        self.buckets = buckets
+        self.limits = limits
+
+    def hit(self, **values):
+        """Count an attempt against each named limit in turn; returns seconds to wait, 0 if allowed.
+
+        Limits after the first one that refuses are left untouched.
+        """
+        for name, value in values.items():
+            capacity, period = self.limits[name]
+            wait = self.buckets.take(f'{name}:{value}', capacity, period)
+            if wait:
+                return wait
+        return 0
+
+    def wait(self, **values):
+        """Seconds until every named limit would allow an attempt, without counting one"""
+        return max((self.buckets.peek(f'{name}:{value}', *self.limits[name]) for name, value in values.items()),
+                   default=0)
+
+    def reset(self, **values):
+        for name, value in values.items():
+            self.buckets.reset(f'{name}:{value}')
@@ -0,0 +1,77 @@
+"""TechFix: an application factory and the blueprints it assembles.
+
+    app = create_app()                                   # configured from the environment
+    app = create_app({'TESTING': True,                   # an isolated app, e.g. one per test
+                      'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'JOBS_EAGER': True})
+
+Creating an app opens no database connection and starts no thread, so it is
+cheap for every gunicorn worker and safe to do before forking (--preload).
+Create or upgrade the schema with `flask db-upgrade` (or upgrade_database()
+inside an app context, for an in-memory test database).
+"""
+import os
+
+from flask import Flask
+from sqlalchemy import event
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from assets import AssetPipeline
+from cache import make_cache
+from instrumentation import Instrumentation
+from jobs import JobQueue
+from pubsub import make_broker
+from ratelimit import RateLimiter, make_buckets
+from . import api, auth, live, main, problems, solutions, uploads
+from .commands import register_commands
+from .config import configure
+from .database import upgrade_database
+from .extensions import (db, job_handlers, job_mergers, login_manager, mail, optimize_on_close,
+                         sqlite_pragmas_listener)
+from .related_problems import RelatedProblems
+from .view_counter import ViewCounter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+__all__ = ['create_app', 'upgrade_database']
+
+
+def create_app(config=None):
+    """Build an app; `config` overrides settings read from the environment"""
+    app = Flask(__name__,
+                template_folder=os.path.join(ROOT, 'templates'),
+                static_folder=os.path.join(ROOT, 'static'),
+                instance_path=os.path.join(ROOT, 'instance'))
+    configure(app, config)
+    os.makedirs(app.instance_path, exist_ok=True)
+    hops = app.config['PROXY_FIX_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    mail.init_app(app)
+
+    # Per-app helpers, reached through the proxies in extensions.py
+    app.extensions['techfix.cache'] = make_cache(app.config)
+    app.extensions['techfix.jobs'] = JobQueue(app.config['JOBS_DATABASE'], eager=app.config['JOBS_EAGER'],
+                                              handlers=job_handlers, mergers=job_mergers)
+    app.extensions['techfix.view_counter'] = ViewCounter(app)
+    app.extensions['techfix.related'] = RelatedProblems(app)
+    app.extensions['techfix.login_limiter'] = RateLimiter(make_buckets(app.config), app.config['LOGIN_RATE_LIMITS'])
+    app.extensions['techfix.broker'] = make_broker(app.config)
+    app.extensions['techfix.assets'] = AssetPipeline(app, os.path.join(app.instance_path, 'assets'))
+
+    instrumentation = Instrumentation(app)
+    app.extensions['techfix.instrumentation'] = instrumentation
+    with app.app_context():
+        # Engines exist from init_app on, but connect only when first used
+        for engine in db.engines.values():
+            event.listen(engine, 'connect', sqlite_pragmas_listener(app))
+            event.listen(engine, 'close', optimize_on_close)
+            instrumentation.watch(engine)
+
+    for blueprint in (main.bp, auth.bp, problems.bp, solutions.bp, uploads.bp, api.bp, live.bp):
+        app.register_blueprint(blueprint)
+
+    register_commands(app)
+    return app
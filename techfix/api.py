@@ -0,0 +1,157 @@
+"""Read-only JSON API, versioned under /api/v1.
+
+    GET /api/v1/problems                    search, category, sort, cursor, per_page as on /browse
+    GET /api/v1/problems?ids=3,1,2          batch fetch, in the order asked for
+    GET /api/v1/problems/<id>
+    GET /api/v1/problems/<id>/solutions     cursor, per_page
+    GET /api/v1/solutions?ids=... | /api/v1/solutions/<id>
+    GET /api/v1/users?ids=...     | /api/v1/users/<id>
+
+Every endpoint takes `fields=id,title,...` to return (and read) only those
+columns. Responses carry a weak ETag built from the rows' updated_at, so a
+client polling with If-None-Match gets an empty 304 until something changes;
+view counts may lag behind, as they do not move updated_at.
+"""
+import hashlib
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy.orm import load_only
+from werkzeug.exceptions import BadRequest, HTTPException, NotFound
+
+from .extensions import db
+from .models import Problem, Solution, User
+from .pagination import keyset_paginate
+from .problems import browse_query
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Public columns per resource; list views leave out the long text by default
+PROBLEM_FIELDS = ('id', 'title', 'description', 'category', 'device_type', 'operating_system', 'urgency',
+                  'is_solved', 'views', 'solution_count', 'user_id', 'created_at', 'updated_at')
+SOLUTION_FIELDS = ('id', 'problem_id', 'user_id', 'title', 'steps', 'difficulty', 'estimated_time',
+                   'upvotes', 'downvotes', 'helpful_score', 'is_verified', 'created_at', 'updated_at')
+USER_FIELDS = ('id', 'username', 'is_helper', 'reputation', 'created_at', 'updated_at')
+LIST_EXCLUDED = {'description', 'steps'}
+
+
+@bp.errorhandler(HTTPException)
+def api_error(e):
+    return jsonify(error=e.description), e.code
+
+
+def requested_fields(allowed, listing=False):
+    """The `fields` query argument, checked against `allowed`"""
+    names = [name for name in request.args.get('fields', '').split(',') if name]
+    if not names:
+        return [name for name in allowed if not (listing and name in LIST_EXCLUDED)]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def requested_ids():
+    try:
+        ids = [int(i) for i in request.args['ids'].split(',') if i]
+    except ValueError:
+        raise BadRequest('ids must be a comma-separated list of integers')
+    if len(ids) > current_app.config['MAX_PAGE_SIZE']:
+        raise BadRequest(f"At most {current_app.config['MAX_PAGE_SIZE']} ids per request")
+    return ids
+
+
+def only(model, fields):
+    """Loader option reading just `fields` (plus updated_at, for the ETag)"""
+    return load_only(*(getattr(model, name) for name in {*fields, 'updated_at'}))
+
+
+def serialize(obj, fields):
+    item = {}
+    for name in fields:
+        value = getattr(obj, name)
+        item[name] = value.isoformat() if isinstance(value, datetime) else value
+    return item
+
+
+def conditional(objects, fields, build, *extra):
+    """Answer 304 if the client's ETag is still current, else the JSON from build()"""
+    validator = repr([fields, [(obj.id, obj.updated_at) for obj in objects], *extra])
+    etag = hashlib.sha1(validator.encode()).hexdigest()[:20]
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'   # may be stored, but revalidate each time
+    return response
+
+
+def batch(model, fields, key):
+    """Rows for ?ids=..., in the order given; unknown ids are left out"""
+    ids = requested_ids()
+    rows = model.query.options(only(model, fields)).filter(model.id.in_(ids)).all() if ids else []
+    by_id = {row.id: row for row in rows}
+    found = [by_id[i] for i in dict.fromkeys(ids) if i in by_id]
+    return conditional(found, fields, lambda: {key: [serialize(row, fields) for row in found]})
+
+
+def single(model, fields, object_id):
+    row = model.query.options(only(model, fields)).filter(model.id == object_id).first()
+    if row is None:
+        raise NotFound(f'No {model.__name__.lower()} #{object_id}')
+    return conditional([row], fields, lambda: serialize(row, fields))
+
+
+# ==================== PROBLEMS ====================
+@bp.route('/problems')
+def problems():
+    fields = requested_fields(PROBLEM_FIELDS, listing='ids' not in request.args)
+    if 'ids' in request.args:
+        return batch(Problem, fields, 'problems')
+
+    search_query = request.args.get('search', '')
+    sort_by = request.args.get('sort') or ('relevance' if search_query else 'newest')
+    query, sort_key, descending = browse_query(search_query, request.args.get('category', ''), sort_by,
+                                               Problem.query.options(only(Problem, fields)))
+    items, next_cursor = keyset_paginate(query, sort_key, descending=descending,
+                                         cursor=request.args.get('cursor'))
+    return conditional(items, fields, lambda: {'problems': [serialize(p, fields) for p in items],
+                                               'next_cursor': next_cursor}, next_cursor)
+
+@bp.route('/problems/<int:problem_id>')
+def problem(problem_id):
+    return single(Problem, requested_fields(PROBLEM_FIELDS), problem_id)
+
+@bp.route('/problems/<int:problem_id>/solutions')
+def problem_solutions(problem_id):
+    fields = requested_fields(SOLUTION_FIELDS, listing=True)
+    query = Solution.query.options(only(Solution, fields)).filter(Solution.problem_id == problem_id)
+    items, next_cursor = keyset_paginate(query, (Solution.created_at, Solution.id), descending=False,
+                                         cursor=request.args.get('cursor'))
+    if not items and not request.args.get('cursor') and db.session.get(Problem, problem_id) is None:
+        raise NotFound(f'No problem #{problem_id}')
+    return conditional(items, fields, lambda: {'solutions': [serialize(s, fields) for s in items],
+                                               'next_cursor': next_cursor}, next_cursor)
+
+# ==================== SOLUTIONS ====================
+@bp.route('/solutions')
+def solutions():
+    if 'ids' not in request.args:
+        raise BadRequest('List solutions through /problems/<id>/solutions, or pass ids')
+    return batch(Solution, requested_fields(SOLUTION_FIELDS), 'solutions')
+
+@bp.route('/solutions/<int:solution_id>')
+def solution(solution_id):
+    return single(Solution, requested_fields(SOLUTION_FIELDS), solution_id)
+
+# ==================== USERS ====================
+@bp.route('/users')
+def users():
+    if 'ids' not in request.args:
+        raise BadRequest('Pass the ids of the users to fetch')
+    return batch(User, requested_fields(USER_FIELDS), 'users')
+
+@bp.route('/users/<int:user_id>')
+def user(user_id):
+    return single(User, requested_fields(USER_FIELDS), user_id)
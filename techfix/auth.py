@@ -0,0 +1,108 @@
+import math
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask_login import login_user, logout_user, login_required, current_user
+from sqlalchemy.orm import load_only
+
+from .extensions import db, login_limiter
+from .models import CategoryReputation, Problem, Solution, User
+from .pagination import keyset_paginate
+from .passwords import verify_password
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        username = request.form['username']
+        email = request.form['email']
+        password = request.form['password']
+
+        if User.query.filter_by(username=username).first():
+            flash('Username already exists!', 'danger')
+            return redirect(url_for('auth.register'))
+
+        if User.query.filter_by(email=email).first():
+            flash('Email already registered!', 'danger')
+            return redirect(url_for('auth.register'))
+
+        new_user = User(username=username, email=email)
+        new_user.set_password(password)
+        db.session.add(new_user)
+        db.session.commit()
+
+        login_user(new_user)
+        flash('✅ Registration successful! Welcome to TechFix!', 'success')
+        return redirect(url_for('auth.welcome_page', username=username))
+
+    return render_template('auth/register.html', title='Register')
+
+@bp.route('/welcome/<username>')
+@login_required
+def welcome_page(username):
+    user = User.query.filter_by(username=username).first_or_404()
+    if user.id != current_user.id:
+        return redirect(url_for('main.home'))
+    return render_template('welcome.html', title=f'Welcome {username}!', user=user)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+
+        # Throttle before touching the database or hashing anything. Every attempt counts
+        # against the client's address but only failed ones against the account, which a
+        # correct password clears
+        account = username.lower()[:80]
+        wait = login_limiter.hit(ip=request.remote_addr) or login_limiter.wait(username=account)
+        if wait:
+            wait = math.ceil(wait)
+            flash(f'Too many login attempts. Please try again in {wait} seconds.', 'danger')
+            return render_template('auth/login.html', title='Login'), 429, {'Retry-After': str(wait)}
+
+        user = User.query.filter_by(username=username).first()
+
+        if verify_password(user, password):
+            login_limiter.reset(username=account)
+            login_user(user)
+            flash(f'Welcome back, {username}!', 'success')
+            return redirect(url_for('main.home'))
+        else:
+            login_limiter.hit(username=account)
+            flash('Invalid username or password', 'danger')
+
+    return render_template('auth/login.html', title='Login')
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('You have been logged out.', 'info')
+    return redirect(url_for('main.home'))
+
+def user_problems_query(user_id):
+    return (Problem.query.filter_by(user_id=user_id)
+            .options(load_only(Problem.id, Problem.title, Problem.views, Problem.solution_count)))
+
+@bp.route('/profile/<username>')
+@login_required
+def profile(username):
+    user = User.query.filter_by(username=username).first_or_404()
+    user_problems, next_cursor = keyset_paginate(user_problems_query(user.id), (Problem.created_at, Problem.id),
+                                                 cursor=request.args.get('cursor'))
+    problem_count = Problem.query.filter_by(user_id=user.id).count()
+    solution_count = Solution.query.filter_by(user_id=user.id).count()
+    top_categories = (CategoryReputation.query.filter(CategoryReputation.user_id == user.id,
+                                                      CategoryReputation.reputation > 0)
+                      .order_by(CategoryReputation.reputation.desc()).limit(3).all())
+
+    return render_template('profile.html',
+                           title=f"{username}'s Profile",
+                           user=user,
+                           problems=user_problems,
+                           problem_count=problem_count,
+                           solution_count=solution_count,
+                           top_categories=top_categories,
+                           next_cursor=next_cursor)
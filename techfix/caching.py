@@ -0,0 +1,66 @@
+import time
+from functools import wraps
+
+from flask import request, session
+from flask_login import current_user
+from sqlalchemy import func
+
+from .extensions import cache, db
+from .models import Problem
+
+
+def listings_version():
+    """Version stamp baked into every listing cache key; bumping it invalidates them all"""
+    version = cache.get('listings:version')
+    if version is None:
+        version = time.time_ns()
+        cache.set('listings:version', version, timeout=0)
+    return version
+
+
+def invalidate_listings():
+    """Call after any write that changes what the home, browse or category lists show"""
+    cache.set('listings:version', time.time_ns(), timeout=0)
+
+
+def cached_page(view):
+    """Serve anonymous GET requests for the view from the cache.
+
+    Logged-in users and responses carrying flashed messages always render fresh;
+    anything other than a rendered page (redirects, errors) is never cached.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or current_user.is_authenticated or '_flashes' in session:
+            return view(*args, **kwargs)
+        key = f'page:{listings_version()}:{request.full_path}'
+        page = cache.get(key)
+        if page is None:
+            page = view(*args, **kwargs)
+            if not isinstance(page, str):
+                return page
+            cache.set(key, page)
+        return page
+    return wrapper
+
+
+def categories_query():
+    """Distinct problem categories, in order.
+
+    SELECT DISTINCT would read every row of the category index; this hops from
+    each category to the next with one index lookup per category instead.
+    """
+    first = db.select(func.min(Problem.category).label('category'))
+    steps = first.cte('categories', recursive=True)
+    following = db.select(func.min(Problem.category)).where(Problem.category > steps.c.category)
+    steps = steps.union_all(db.select(following.scalar_subquery()).where(steps.c.category.is_not(None)))
+    return db.select(steps.c.category).where(steps.c.category.is_not(None))
+
+
+def get_categories():
+    key = f'categories:{listings_version()}'
+    categories = cache.get(key)
+    if categories is None:
+        categories = [category for category in db.session.scalars(categories_query()) if category]
+        cache.set(key, categories)
+    return categories
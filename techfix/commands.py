@@ -0,0 +1,231 @@
+"""`flask` commands, registered on the app by create_app()"""
+import json
+import re
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, text
+
+import migrations
+from .auth import user_problems_query
+from .caching import categories_query, invalidate_listings
+from .data import DATA_MODELS, export_rows, import_records, read_records
+from .database import (rebuild_search_index, recompute_reputation, reconcile_counters, search_index_suspended,
+                       upgrade_database)
+from .extensions import db, jobs
+from .main import leaderboard_query, recent_solved_query
+from .models import CategoryReputation, Problem, Solution, User
+from .notifications import job_context
+from .pagination import encode_cursor, keyset_query
+from .problems import browse_query
+from .related_problems import RELATED_LIMIT, reindex_related
+from .uploads import collect_profile_pics_job
+
+cli = AppGroup(__name__)
+
+
+def register_commands(app):
+    for command in cli.commands.values():
+        app.cli.add_command(command)
+
+# ==================== DATABASE SCHEMA ====================
+@cli.command('db-upgrade')
+def db_upgrade_command():
+    """Create the database, or apply pending schema migrations to it"""
+    upgrade_database()
+    with db.engine.connect() as conn:
+        print(f"✅ Database at schema version {migrations.get_version(conn)}")
+
+
+@cli.command('db-version')
+def db_version_command():
+    """Show the current and latest schema versions"""
+    with db.engine.connect() as conn:
+        print(f"Schema version {migrations.get_version(conn)} (latest {migrations.latest_version()})")
+
+
+@cli.command('db-analyze')
+def db_analyze_command():
+    """Refresh the query planner's statistics from the current data"""
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+    print("✅ Planner statistics refreshed")
+
+
+@cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Recompute denormalized solution and vote counters from the solutions and votes tables"""
+    print(f"✅ Solution counters recomputed for {reconcile_counters()} problems")
+
+
+@cli.command('rebuild-search')
+def rebuild_search_command():
+    """Rebuild the full-text search index for an existing database"""
+    rebuild_search_index()
+    print(f"✅ Search index rebuilt for {Problem.query.count()} problems")
+
+
+@cli.command('recompute-reputation')
+def recompute_reputation_command():
+    """Recompute all reputation totals from solution votes and verifications"""
+    recompute_reputation()
+    print(f"✅ Reputation recomputed for {User.query.count()} users")
+
+# ==================== STATIC ASSETS ====================
+@cli.command('assets-build')
+def assets_build_command():
+    """Precompress fingerprinted static assets (gzip, plus brotli if installed)"""
+    assets = current_app.extensions['techfix.assets']
+    written = assets.build()
+    print(f"✅ {len(assets.manifest())} assets, {written} compressed variants written")
+
+# ==================== RELATED PROBLEMS ====================
+@cli.command('related')
+@click.argument('problem_id', type=int)
+def related_command(problem_id):
+    """Show the problems most similar to PROBLEM_ID"""
+    problem = db.session.get(Problem, problem_id)
+    if problem is None:
+        raise SystemExit(f"❌ No problem #{problem_id}")
+    related = current_app.extensions['techfix.related']
+    related.sync()
+    for match_id, score in related.index.similar(problem.id, RELATED_LIMIT):
+        print(f"{score:.3f}  #{match_id} {db.session.get(Problem, match_id).title}")
+
+# ==================== BACKGROUND JOBS ====================
+@cli.command('jobs-worker')
+@click.option('--threads', default=4, show_default=True, help='Jobs to run concurrently.')
+@click.option('--burst', is_flag=True, help='Exit once no job is due instead of polling.')
+def jobs_worker_command(threads, burst):
+    """Run background jobs"""
+    print(f"✅ Job worker started with {threads} threads")
+    try:
+        jobs.work(threads=threads, context=job_context(current_app._get_current_object()), burst=burst)
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command('jobs-status')
+def jobs_status_command():
+    """Show job counts by status and prune old finished jobs"""
+    pruned = jobs.prune()
+    for status, count in sorted(jobs.stats().items()):
+        print(f"{status}: {count}")
+    print(f"(pruned {pruned} finished jobs older than a week)")
+
+
+@cli.command('gc-uploads')
+def gc_uploads_command():
+    """Delete profile pictures and thumbnails no user refers to"""
+    print(f"✅ Removed {collect_profile_pics_job()} orphaned files")
+
+# ==================== IMPORT / EXPORT ====================
+@cli.command('export-data')
+@click.argument('output', type=click.File('w'))
+@click.option('--chunk-size', default=2000, show_default=True, help='Rows fetched per round trip.')
+def export_data_command(output, chunk_size):
+    """Write users, problems, solutions and votes to OUTPUT as JSONL"""
+    for kind in DATA_MODELS:
+        written = 0
+        for record in export_rows(kind, chunk_size):
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            written += 1
+        click.echo(f"✅ Exported {written} {kind}s", err=True)
+
+
+@cli.command('import-data')
+@click.argument('source', type=click.File('r'))
+@click.option('--chunk-size', default=2000, show_default=True, help='Rows upserted per transaction.')
+def import_data_command(source, chunk_size):
+    """Upsert users, problems, solutions and votes from a JSONL file made by export-data.
+
+    Rows are matched on their primary key, so importing the same file again changes nothing;
+    columns a record leaves out keep their current values. Counters and reputation are
+    recomputed afterwards.
+    """
+    started = time.perf_counter()
+
+    def progress(counts):
+        total = sum(counts.values())
+        click.echo(f"⏳ {total} rows ({total / (time.perf_counter() - started):.0f}/s)", err=True)
+
+    with search_index_suspended():
+        counts = import_records(read_records(source), chunk_size, progress)
+    reconcile_counters()
+    recompute_reputation()
+    db.session.execute(text('PRAGMA optimize'))
+    invalidate_listings()
+    reindex_related()   # imported rows keep their updated_at, so syncing would miss edits
+    summary = ', '.join(f"{counts[kind]} {kind}s" for kind in DATA_MODELS)
+    print(f"✅ Imported {summary} in {time.perf_counter() - started:.1f}s")
+
+# ==================== QUERY PLANS ====================
+def explain_query_plan(query):
+    """SQLite's EXPLAIN QUERY PLAN lines for an ORM query"""
+    statement = query.statement if hasattr(query, 'statement') else query
+    compiled = statement.compile(dialect=db.engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).all()
+    return [row[-1] for row in rows]
+
+
+def unindexed_steps(plan, limited, sorted_by_relevance=False):
+    """The lines of `plan` that read rows without an index seek.
+
+    Reading a table front to back is only allowed as the outer loop of a
+    LIMITed query walking an index in ORDER BY order, where it stops after a
+    page of rows. A temp B-tree means sorting every matching row, which only
+    search results ordered by relevance cannot avoid.
+    """
+    loops = [line for line in plan if line.startswith(('SCAN ', 'SEARCH '))]
+    steps = []
+    for line in plan:
+        if line.startswith('USE TEMP B-TREE FOR ORDER BY'):
+            if not sorted_by_relevance:
+                steps.append(line)
+        elif re.match(r'SCAN (problems|solutions|users|votes|category_reputation)(_\d+)?\b', line):
+            if not (limited and line is loops[0] and ' USING INDEX ' in line):
+                steps.append(line)
+    return steps
+
+
+@cli.command('explain-queries')
+def explain_queries_command():
+    """Fail if any route's query scans a table or sorts its rows instead of using an index"""
+    sample_cursor = encode_cursor([datetime.utcnow(), 1])
+    checks = [('home', recent_solved_query()),
+              ('profile user', User.query.filter_by(username='techhelper')),
+              ('profile problems', keyset_query(user_problems_query(1), (Problem.created_at, Problem.id),
+                                                True, sample_cursor, 20)),
+              ('profile problem count', Problem.query.filter_by(user_id=1).with_entities(func.count())),
+              ('profile solution count', Solution.query.filter_by(user_id=1).with_entities(func.count())),
+              ('problem solutions', Solution.query.filter_by(problem_id=1)
+                                                  .order_by(Solution.created_at, Solution.id)),
+              ('profile categories', CategoryReputation.query.filter(CategoryReputation.user_id == 1)
+                                                         .order_by(CategoryReputation.reputation.desc())),
+              ('leaderboard', leaderboard_query()),
+              ('leaderboard category', leaderboard_query('Software')),
+              ('categories', categories_query())]
+    for sort_by in ('newest', 'views', 'solutions', 'unsolved'):
+        for category in ('', 'Software'):
+            query, sort_key, descending = browse_query('', category, sort_by)
+            sample_key = datetime.utcnow() if isinstance(sort_key[0].type, db.DateTime) else 1
+            for page, cursor in ((1, None), (2, encode_cursor([sample_key, 1]))):
+                label = f"browse sort={sort_by}{' category' if category else ''} page {page}"
+                checks.append((label, keyset_query(query, sort_key, descending, cursor, 20)))
+    query, sort_key, descending = browse_query('wifi', '', 'relevance')
+    checks.append(('browse search', keyset_query(query, sort_key, descending, None, 20)))
+
+    failures = 0
+    for label, query in checks:
+        plan = explain_query_plan(query)
+        limited = ' LIMIT ' in str(query.statement if hasattr(query, 'statement') else query)
+        scans = unindexed_steps(plan, limited, sorted_by_relevance=label == 'browse search')
+        failures += bool(scans)
+        print(f"{'❌' if scans else '✅'} {label}: {' | '.join(plan)}")
+
+    if failures:
+        raise SystemExit(1)
@@ -0,0 +1,139 @@
+import os
+
+from sqlalchemy.engine import make_url
+
+
+# Database profile, picked with TECHFIX_DB_PROFILE. 'production' uses WAL journaling so
+# readers never wait for the writer, waits on locks instead of failing with
+# "database is locked", and sizes the connection pool for threaded workers.
+SQLITE_PROFILES = {
+    'development': {
+        'pragmas': {},
+        'engine_options': {},
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',    # safe with WAL; fsync at checkpoints only
+            'busy_timeout': 5000,       # ms
+            'cache_size': -32000,       # KiB per connection
+            'mmap_size': 268435456,     # bytes
+            'temp_store': 'MEMORY',
+        },
+        'engine_options': {
+            'pool_size': 10,
+            'max_overflow': 10,
+            'pool_timeout': 10,
+            'connect_args': {'timeout': 5, 'check_same_thread': False},
+        },
+    },
+}
+
+
+def configure(app, overrides=None):
+    """Fill app.config from the environment, then apply `overrides` (e.g. from a test)"""
+    config = app.config
+    config['SECRET_KEY'] = 'dev-key-change-later'
+    config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///techfix.db')
+    config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    config['DB_PROFILE'] = os.environ.get('TECHFIX_DB_PROFILE', 'development')
+
+    # Optionally answer reads made by GET requests from a separate read-only connection pool
+    config['SQLITE_READ_ONLY_GETS'] = os.environ.get('TECHFIX_DB_READ_ONLY_GETS') == '1'
+    # Connections kept per process; gunicorn.conf.py sets this to the threads per worker
+    pool_size = os.environ.get('TECHFIX_DB_POOL_SIZE')
+    config['DB_POOL_SIZE'] = int(pool_size) if pool_size else None
+
+    # Listing pages
+    config['PAGE_SIZE'] = 20
+    config['MAX_PAGE_SIZE'] = 100
+
+    # Buffered view counts are written every VIEW_FLUSH_INTERVAL seconds
+    # or as soon as VIEW_FLUSH_THRESHOLD views are pending
+    config['VIEW_FLUSH_INTERVAL'] = 10
+    config['VIEW_FLUSH_THRESHOLD'] = 200
+
+    # Related problems: each worker keeps its own similarity index, synced by a background thread.
+    # Problems posted through it are indexed at once; edits, deletions and problems posted through
+    # other workers within RELATED_SYNC_INTERVAL seconds. RELATED_EAGER syncs on the request instead.
+    config['RELATED_SYNC_INTERVAL'] = 5
+    config['RELATED_EAGER'] = False
+
+    # Page/fragment cache: 'memory' is per process, use 'filesystem' to share it between gunicorn workers
+    config['CACHE_TYPE'] = os.environ.get('TECHFIX_CACHE', 'memory')
+    config['CACHE_DIR'] = os.environ.get('TECHFIX_CACHE_DIR', os.path.join(app.instance_path, 'cache'))
+    config['CACHE_DEFAULT_TIMEOUT'] = 60
+
+    # Email config (optional); for local testing point it at an SMTP stand-in, e.g.
+    # MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=0 with `python -m aiosmtpd -n -l localhost:1025`
+    config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
+    config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+    config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', '1') == '1'
+    config['MAIL_USERNAME'] = 'your-techfix-email@gmail.com'
+    config['MAIL_PASSWORD'] = 'your-app-password'
+    config['MAIL_DEFAULT_SENDER'] = ('U. TechFix Solutions', 'noreply@techfix.com')
+
+    # Background jobs (run them with `flask jobs-worker`); TECHFIX_JOBS_EAGER=1 runs them inline instead
+    config['JOBS_DATABASE'] = os.environ.get('TECHFIX_JOBS_DATABASE', os.path.join(app.instance_path, 'jobs.db'))
+    config['JOBS_EAGER'] = os.environ.get('TECHFIX_JOBS_EAGER') == '1'
+    # Base URL for links in emails sent from background jobs
+    config['SITE_URL'] = os.environ.get('TECHFIX_SITE_URL', 'http://localhost:5000')
+    # New-solution emails to the same person within this many seconds are sent as one digest
+    config['NOTIFY_DIGEST_DELAY'] = 300
+
+    # Instrumentation (see instrumentation.py): slow statements/requests are logged as warnings
+    config['SLOW_QUERY_THRESHOLD'] = float(os.environ.get('TECHFIX_SLOW_QUERY', 0.1))
+    config['SLOW_REQUEST_THRESHOLD'] = float(os.environ.get('TECHFIX_SLOW_REQUEST', 1.0))
+    # Profile requests sending `X-Profile: <token>`, and/or this fraction of all requests
+    config['PROFILE_TOKEN'] = os.environ.get('TECHFIX_PROFILE_TOKEN')
+    config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('TECHFIX_PROFILE_SAMPLE', 0))
+    config['PROFILER'] = os.environ.get('TECHFIX_PROFILER', 'cprofile')  # or 'pyinstrument'
+    config['PROFILE_DIR'] = os.path.join(app.instance_path, 'profiles')
+    # /metrics totals: 'memory' is per process, 'sqlite' sums every gunicorn worker's counts. Scrapes
+    # are answered from the host itself, or with `Authorization: Bearer <METRICS_TOKEN>`
+    config['METRICS_BACKEND'] = os.environ.get('TECHFIX_METRICS', 'memory')
+    config['METRICS_DATABASE'] = os.path.join(app.instance_path, 'metrics.db')
+    config['METRICS_TOKEN'] = os.environ.get('TECHFIX_METRICS_TOKEN')
+
+    # Login throttling (see ratelimit.py): at most `capacity` attempts per `period` seconds from
+    # each client IP, and `capacity` failed ones per username. 'memory' buckets are per process;
+    # 'sqlite' shares them between gunicorn workers
+    config['LOGIN_RATE_LIMITS'] = {'ip': (20, 60), 'username': (5, 300)}
+    # Reverse proxies in front of the app that add X-Forwarded-For/-Proto/-Host (nginx: 1). Their
+    # headers then give the client's address, which the per-IP limit above and /metrics go by; keep
+    # 0 when clients connect directly, or anyone could claim any address
+    config['PROXY_FIX_HOPS'] = int(os.environ.get('TECHFIX_PROXY_HOPS', 0))
+    config['RATELIMIT_BACKEND'] = os.environ.get('TECHFIX_RATELIMIT', 'memory')
+    config['RATELIMIT_DATABASE'] = os.path.join(app.instance_path, 'ratelimit.db')
+    # Password hashing; hashes stored with other parameters are upgraded at the owner's next login
+    config['PASSWORD_HASH_METHOD'] = os.environ.get('TECHFIX_PASSWORD_HASH', 'pbkdf2:sha256:600000')
+
+    # Live updates on problem pages (see pubsub.py and techfix/live.py). 'memory' reaches only the
+    # viewers connected to the same process; 'sqlite' shares events between gunicorn workers
+    config['LIVE_BACKEND'] = os.environ.get('TECHFIX_LIVE', 'memory')
+    config['LIVE_DATABASE'] = os.path.join(app.instance_path, 'events.db')
+    # Seconds between keep-alive comments on an idle event stream
+    config['LIVE_HEARTBEAT'] = 15
+    # Hold a WSGI thread open per viewer for the event stream? By default only under the
+    # development server: gunicorn's sync/gthread workers run out of threads that way, and in
+    # asgi mode asgi.py serves the streams itself. Elsewhere pages simply do not update live
+    config['LIVE_WSGI_STREAMS'] = os.environ.get('TECHFIX_LIVE_WSGI_STREAMS') == '1'
+
+    # Profile pictures
+    config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads', 'profile_pics')
+    config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024  # 2MB max
+
+    config.update(overrides or {})
+
+    # Settings derived from the ones above, unless given explicitly
+    profile = SQLITE_PROFILES[config['DB_PROFILE']]
+    config.setdefault('SQLITE_PRAGMAS', profile['pragmas'])
+    engine_options = profile['engine_options']
+    if config['DB_POOL_SIZE']:
+        engine_options = {**engine_options, 'pool_size': config['DB_POOL_SIZE']}
+    config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options)
+    if config['SQLITE_READ_ONLY_GETS'] and 'SQLALCHEMY_BINDS' not in config:
+        db_url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+        config['SQLALCHEMY_BINDS'] = {
+            'readonly': db_url.set(database=f'file:{db_url.database}', query={'mode': 'ro', 'uri': 'true'}),
+        }
@@ -0,0 +1,121 @@
+"""JSONL import/export.
+
+One JSON object per line, tagged with its kind: {"type": "problem", "id": 1, ...}.
+Kinds are listed parents first, so foreign keys are satisfied in file order.
+Records may leave columns out: new rows get the column defaults, existing rows
+keep what they have.
+"""
+import json
+from collections import Counter
+from datetime import datetime
+
+import click
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .extensions import db
+from .models import Problem, Solution, User, Vote, parse_steps
+
+DATA_MODELS = {'user': User, 'problem': Problem, 'solution': Solution, 'vote': Vote}
+DERIVED_COLUMNS = {'parsed_steps', 'helpful_score'}  # recomputed on import
+
+
+def data_columns(model):
+    return [c for c in model.__table__.columns if c.name not in DERIVED_COLUMNS]
+
+def export_rows(kind, chunk_size):
+    """Yield one JSON-ready dict per row, streaming the table in chunks"""
+    model = DATA_MODELS[kind]
+    columns = data_columns(model)
+    with db.engine.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size).execute(
+            db.select(*columns).order_by(*model.__table__.primary_key.columns))
+        for row in result:
+            record = {'type': kind}
+            for c, value in zip(columns, row):
+                record[c.name] = value.isoformat() if isinstance(value, datetime) else value
+            yield record
+
+def upsert_rows(conn, kind, records):
+    """Insert or update (by primary key) a batch, one executemany per set of columns present"""
+    model = DATA_MODELS[kind]
+    columns = {c.name: c for c in data_columns(model)}
+    primary_key = list(model.__table__.primary_key.columns)
+    key_names = {c.name for c in primary_key}
+    batches = {}
+    for record in records:
+        row = {}
+        for name, value in record.items():
+            c = columns.get(name)
+            if c is None:
+                continue
+            if value is not None and isinstance(c.type, db.DateTime):
+                value = datetime.fromisoformat(value)
+            row[name] = value
+        if 'updated_at' in columns and row.get('updated_at') is None and 'created_at' in row:
+            row['updated_at'] = row['created_at']   # files from before solutions/users had it
+        if kind == 'solution' and 'steps' in row:
+            row['parsed_steps'] = parse_steps(row['steps'])
+        batches.setdefault(tuple(sorted(row)), []).append(row)
+    for names, rows in batches.items():
+        if set(columns) <= set(names):
+            stmt = sqlite_insert(model.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=primary_key,
+                set_={name: stmt.excluded[name] for name in names if name not in key_names},
+            )
+            conn.execute(stmt, rows)
+        else:
+            update_partial_rows(conn, model, rows)
+
+def update_partial_rows(conn, model, rows):
+    """Update the rows that exist and insert the others.
+
+    Not an upsert: SQLite checks NOT NULL columns before it looks for a
+    conflict, so a record leaving one out could not even update.
+    """
+    primary_key = list(model.__table__.primary_key.columns)
+    key_names = {c.name for c in primary_key}
+    keys = [tuple(row.get(c.name) for c in primary_key) for row in rows]
+    existing = set(conn.execute(db.select(*primary_key).where(
+        db.tuple_(*primary_key).in_([key for key in keys if None not in key]))).all())
+    updates = [row for row, key in zip(rows, keys) if key in existing]
+    inserts = [row for row, key in zip(rows, keys) if key not in existing]
+    if updates and len(updates[0]) > len(primary_key):
+        # Key columns are matched through their own parameters; the rest of each row is the SET clause
+        stmt = db.update(model.__table__).where(*(c == db.bindparam(f'key_{c.name}') for c in primary_key))
+        conn.execute(stmt, [{**{name: value for name, value in row.items() if name not in key_names},
+                             **{f'key_{c.name}': row[c.name] for c in primary_key}} for row in updates])
+    if inserts:
+        conn.execute(db.insert(model.__table__), inserts)
+
+def read_records(lines):
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record.get('type') not in DATA_MODELS:
+            raise click.ClickException(f"Line {number}: unknown record type {record.get('type')!r}")
+        yield record
+
+def import_records(records, chunk_size, progress=None):
+    """Upsert records in chunked transactions; returns rows imported per kind"""
+    pending = {kind: [] for kind in DATA_MODELS}
+    counts = Counter()
+
+    def flush():
+        with db.engine.begin() as conn:
+            for kind, records in pending.items():   # parents before children
+                if records:
+                    upsert_rows(conn, kind, records)
+                    counts[kind] += len(records)
+                    records.clear()
+        if progress:
+            progress(counts)
+
+    for record in records:
+        kind = record['type']
+        pending[kind].append(record)
+        if len(pending[kind]) >= chunk_size:
+            flush()
+    flush()
+    return counts
@@ -0,0 +1,158 @@
+"""Schema setup, the search index and set-based maintenance of derived columns.
+
+Nothing here runs at import or app creation: the schema is created and
+upgraded by `flask db-upgrade`, so starting a worker never touches the
+database.
+"""
+import re
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import Float, Integer, event, text, column
+
+import migrations
+from .extensions import db
+from .models import Problem, Solution, parse_steps
+
+
+# ==================== DATABASE SCHEMA ====================
+def upgrade_database():
+    """Create missing tables and apply pending migrations"""
+    db.create_all()
+    for number, description in migrations.upgrade(db.engine):
+        print(f"✅ Applied migration {number}: {description}")
+        if number == 5:
+            print(f"✅ Parsed steps of {backfill_parsed_steps()} solutions")
+    detect_search_backend()
+
+
+def backfill_parsed_steps():
+    """Fill parsed_steps for solutions written before it existed"""
+    rows = db.session.execute(
+        db.select(Solution.id, Solution.steps).where(Solution.parsed_steps.is_(None))).all()
+    if rows:
+        db.session.execute(db.update(Solution), [
+            {'id': solution_id, 'parsed_steps': parse_steps(steps)} for solution_id, steps in rows])
+        db.session.commit()
+    return len(rows)
+
+
+def reconcile_counters():
+    """Recompute problems' solution_count/is_solved and solutions' vote counts in set-based UPDATEs.
+
+    Solutions without any votes keep their counts: data files from before votes
+    were exported carry the counts alone.
+    """
+    result = db.session.execute(text("""
+        UPDATE problems SET
+            solution_count = (SELECT COUNT(*) FROM solutions WHERE solutions.problem_id = problems.id),
+            is_solved = EXISTS (SELECT 1 FROM solutions WHERE solutions.problem_id = problems.id)
+    """))
+    db.session.execute(text("""
+        UPDATE solutions SET
+            upvotes = (SELECT COUNT(*) FROM votes WHERE votes.solution_id = solutions.id AND value > 0),
+            downvotes = (SELECT COUNT(*) FROM votes WHERE votes.solution_id = solutions.id AND value < 0)
+        WHERE id IN (SELECT solution_id FROM votes)
+    """))
+    db.session.commit()
+    return result.rowcount
+
+
+def recompute_reputation():
+    """Rebuild users.reputation and category_reputation from solution votes and verifications"""
+    with db.engine.begin() as conn:
+        migrations.recompute_reputation(conn)
+
+# ==================== SEARCH INDEX ====================
+def rebuild_search_index():
+    """Recreate and repopulate the search index from the problems and solutions tables"""
+    with db.engine.begin() as conn:
+        migrations.run_all(conn, migrations.SEARCH_INDEX_SCHEMA)
+        migrations.populate_search_index(conn)
+    detect_search_backend()
+
+
+def detect_search_backend():
+    """Use FTS5 when the search index exists, LIKE filtering otherwise"""
+    with db.engine.connect() as conn:
+        has_index = migrations.has_table(conn, 'solution_search')
+    current_app.config['SEARCH_BACKEND'] = 'fts5' if has_index else 'like'
+
+
+def search_backend():
+    """'fts5' or 'like', looked up on first use rather than at startup"""
+    if 'SEARCH_BACKEND' not in current_app.config:
+        detect_search_backend()
+    return current_app.config['SEARCH_BACKEND']
+
+
+def search_terms(search_query):
+    """FTS5 queries for each distinct word of free text, matching it as a prefix"""
+    return [f'"{term}"*' for term in dict.fromkeys(re.findall(r'\w+', search_query.lower()))]
+
+
+def uses_fts(search_query):
+    return bool(search_terms(search_query)) and search_backend() == 'fts5'
+
+
+def search_hits(search_query):
+    """(problem_id, rank) of every problem matching all the words of a search.
+
+    A word may match the problem itself or any of its solutions. rank adds up
+    each word's best bm25 score across those documents; lower is better.
+    """
+    terms = search_terms(search_query)
+    matches = ' UNION ALL '.join(
+        f"SELECT rowid AS problem_id, {i} AS term, rank FROM problem_search WHERE problem_search MATCH :term_{i}"
+        f" UNION ALL SELECT problem_id, {i}, rank FROM solution_search WHERE solution_search MATCH :term_{i}"
+        for i in range(len(terms)))
+    return (text(f"""SELECT problem_id, sum(rank) AS rank FROM (
+                         SELECT problem_id, term, min(rank) AS rank FROM ({matches}) GROUP BY problem_id, term
+                     ) GROUP BY problem_id HAVING count(*) = {len(terms):d}""")
+            .bindparams(**{f'term_{i}': term for i, term in enumerate(terms)})
+            .columns(column('problem_id', Integer), column('rank', Float))
+            .subquery('search_hits'))
+
+
+def apply_search(query, search_query):
+    """Filter `query` to problems matching the search; returns it with the relevance column, if any"""
+    if uses_fts(search_query):
+        hits = search_hits(search_query)
+        return query.join(hits, hits.c.problem_id == Problem.id), hits.c.rank
+    return query.filter(
+        (Problem.title.ilike(f'%{search_query}%')) |
+        (Problem.description.ilike(f'%{search_query}%'))
+    ), None
+
+
+@contextmanager
+def search_index_suspended():
+    """Stop maintaining the search index row by row; rebuild it once at the end.
+
+    Bulk loads would otherwise rewrite a problem's index entry for every one
+    of its solutions.
+    """
+    if search_backend() != 'fts5':
+        yield
+        return
+    with db.engine.begin() as conn:
+        migrations.drop_search_triggers(conn)
+    try:
+        yield
+    finally:
+        rebuild_search_index()
+
+# ==================== QUERY COUNTING ====================
+@contextmanager
+def count_queries():
+    """Collect every SQL statement executed inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
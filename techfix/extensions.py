@@ -0,0 +1,99 @@
+"""Extension objects, created unbound and attached to each app by create_app().
+
+Flask-SQLAlchemy, Flask-Login and Flask-Mail support this directly. The app's
+own helpers (cache, job queue, view counter, login limiter, live update broker)
+are built per app and reached through proxies to the current app, so two apps
+in one process - say, two tests with their own in-memory databases - never
+share state.
+"""
+import sqlite3
+
+from flask import current_app, has_request_context, request
+from flask_login import LoginManager
+from flask_mail import Mail
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+from werkzeug.local import LocalProxy
+
+
+class RoutingSession(Session):
+    """Sends SELECTs issued while handling a GET request to the read-only bind, if configured.
+
+    Once a transaction has used the writer (a flush, bulk update or raw SQL) it
+    keeps reading from the writer so it sees its own uncommitted changes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engines = self._db.engines
+        if ('readonly' in engines and bind is None and isinstance(clause, Select)
+                and not self._flushing and not self.info.get('uses_writer')
+                and has_request_context() and request.method in ('GET', 'HEAD')):
+            return engines['readonly']
+        self.info['uses_writer'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def reset_session_routing(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('uses_writer', None)
+
+
+def sqlite_pragmas_listener(app):
+    """A `connect` listener applying the app's SQLITE_PRAGMAS to each new connection"""
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for name, value in app.config['SQLITE_PRAGMAS'].items():
+            try:
+                cursor.execute(f'PRAGMA {name} = {value}')
+            except sqlite3.OperationalError as e:
+                # e.g. journal_mode cannot be changed through a read-only connection
+                app.logger.debug('PRAGMA %s not applied: %s', name, e)
+        cursor.close()
+    return set_sqlite_pragmas
+
+
+def optimize_on_close(dbapi_connection, connection_record):
+    """A pool `close` listener letting SQLite refresh the planner statistics it has found stale"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    try:
+        # Only analyzes tables this connection's queries used whose row counts moved a lot, so it is cheap
+        dbapi_connection.execute('PRAGMA optimize')
+    except sqlite3.Error:
+        pass    # read-only or busy connection; another close will do it
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+mail = Mail()
+
+# Job handlers and payload mergers, registered at import time with @task and shared by every app's queue
+job_handlers = {}
+job_mergers = {}
+
+
+def task(name, merge=None):
+    """Register the decorated function as the handler for background jobs called `name`.
+
+    `merge(pending, new)` folds a new payload into a pending job with the same
+    dedupe key; see JobQueue.enqueue.
+    """
+    def register(fn):
+        job_handlers[name] = fn
+        if merge:
+            job_mergers[name] = merge
+        return fn
+    return register
+
+
+cache = LocalProxy(lambda: current_app.extensions['techfix.cache'])
+jobs = LocalProxy(lambda: current_app.extensions['techfix.jobs'])
+view_counter = LocalProxy(lambda: current_app.extensions['techfix.view_counter'])
+login_limiter = LocalProxy(lambda: current_app.extensions['techfix.login_limiter'])
+broker = LocalProxy(lambda: current_app.extensions['techfix.broker'])
@@ -0,0 +1,112 @@
+"""Live updates for problem pages, over server-sent events.
+
+    GET /problem/<id>/events        text/event-stream
+
+Each problem has a channel on the broker (see pubsub.py). New solutions,
+votes and verifications publish small JSON deltas on it, told apart by their
+`type`:
+
+    solution    the new solution, as solution_payload() builds it
+    votes       {solution_id, upvotes, downvotes, helpful_score}
+    verified    {solution_id, is_verified}
+
+so open pages update in place instead of every viewer reloading the page.
+EventSource reconnects on its own and sends Last-Event-ID; whatever was
+missed meanwhile is replayed from the broker's history.
+
+In asgi mode (see gunicorn.conf.py) asgi.py answers this URL itself on the
+event loop, so an open page does not hold a thread; the view below is the
+WSGI fallback, see LIVE_WSGI_STREAMS.
+"""
+import json
+
+from flask import Blueprint, Response, current_app, request, url_for
+
+from .extensions import broker, db
+from .models import Problem
+
+bp = Blueprint('live', __name__)
+
+RETRY_MS = 3000     # how long EventSource waits before reconnecting
+
+
+def channel(problem_id):
+    return f'problem:{problem_id}'
+
+
+def publish(problem_id, payload):
+    """Push `payload` to the problem's viewers; never fails the request that made the change"""
+    try:
+        broker.publish(channel(problem_id), json.dumps(payload))
+    except Exception:
+        current_app.logger.exception('Could not publish %s update for problem #%s', payload['type'], problem_id)
+
+
+def solution_payload(problem, solution):
+    return {
+        'type': 'solution',
+        'id': solution.id,
+        'title': solution.title,
+        'difficulty': solution.difficulty,
+        'estimated_time': solution.estimated_time,
+        'steps': solution.step_list,
+        'author': solution.author.username,
+        'author_url': url_for('auth.profile', username=solution.author.username),
+        'created_at': solution.created_at.strftime('%b %d, %Y'),
+        'vote_url': url_for('solutions.vote_solution', solution_id=solution.id),
+        'upvote_url': url_for('solutions.upvote_solution', solution_id=solution.id),
+        'downvote_url': url_for('solutions.downvote_solution', solution_id=solution.id),
+        'verify_url': url_for('solutions.verify_solution', solution_id=solution.id),
+        'solution_count': problem.solution_count,
+    }
+
+
+def publish_solution(problem, solution):
+    publish(problem.id, solution_payload(problem, solution))
+
+
+def publish_votes(solution):
+    publish(solution.problem_id, {'type': 'votes', 'solution_id': solution.id, 'upvotes': solution.upvotes,
+                                  'downvotes': solution.downvotes, 'helpful_score': solution.helpful_score})
+
+
+def publish_verified(solution):
+    publish(solution.problem_id, {'type': 'verified', 'solution_id': solution.id,
+                                  'is_verified': solution.is_verified})
+
+
+def sse_message(event):
+    return f'id: {event.id}\ndata: {event.data}\n\n'
+
+
+def open_stream(problem_id, last_event_id=None, **options):
+    """Subscribe to a problem's updates; None if there is no such problem"""
+    if db.session.scalar(db.select(Problem.id).where(Problem.id == problem_id)) is None:
+        return None
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_id = None
+    return broker.subscribe(channel(problem_id), last_id, **options)
+
+
+@bp.route('/problem/<int:problem_id>/events')
+def problem_events(problem_id):
+    if not (current_app.config['LIVE_WSGI_STREAMS']
+            or request.environ.get('SERVER_SOFTWARE', '').startswith('Werkzeug/')):
+        return Response(status=204)     # tells EventSource not to reconnect
+    subscription = open_stream(problem_id, request.headers.get('Last-Event-ID'))
+    if subscription is None:
+        return Response(status=404)
+    heartbeat = current_app.config['LIVE_HEARTBEAT']
+
+    def stream():
+        # Runs after the request's app context is gone; it needs nothing from it
+        with subscription:
+            yield f'retry: {RETRY_MS}\n\n'
+            while not subscription.overflowed:
+                event = subscription.get(timeout=heartbeat)
+                yield sse_message(event) if event else ': keep-alive\n\n'
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
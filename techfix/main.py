@@ -0,0 +1,202 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask_login import current_user
+from sqlalchemy.orm import defer
+
+from .caching import cached_page, get_categories, invalidate_listings
+from .extensions import db
+from .models import CategoryReputation, Problem, Solution, User, Vote
+
+bp = Blueprint('main', __name__)
+
+LEADERBOARD_SIZE = 20
+
+
+@bp.app_context_processor
+def inject_user():
+    return dict(current_user=current_user)
+
+def recent_solved_query():
+    return (Problem.query.options(defer(Problem.description))
+            .filter_by(is_solved=True).order_by(Problem.created_at.desc()).limit(4))
+
+@bp.route('/')
+@cached_page
+def home():
+    recent_problems = recent_solved_query().all()
+    return render_template('index.html', title='Home', recent_problems=recent_problems)
+
+# ==================== SAMPLE DATA ====================
+@bp.route('/add-real-solutions')
+def add_real_solutions():
+    """Add real tech solutions with actual steps"""
+    try:
+        # Clear existing data
+        Vote.query.delete()
+        Solution.query.delete()
+        CategoryReputation.query.delete()
+        Problem.query.delete()
+        User.query.filter_by(username='techhelper').delete()
+        User.query.filter_by(username='testuser').delete()
+        db.session.commit()
+
+        # Create helper user
+        helper = User(username='techhelper', email='helper@techfix.com', is_helper=True)
+        helper.set_password('help123')
+        db.session.add(helper)
+
+        # Create test user
+        test_user = User(username='testuser', email='test@techfix.com')
+        test_user.set_password('test123')
+        db.session.add(test_user)
+
+        db.session.commit()
+
+        # Sample problems with solutions
+        problems_data = [
+            {
+                'title': 'Python 3.11 Installation Guide for Windows 11',
+                'description': 'Complete step-by-step guide to install Python on Windows 11 with troubleshooting tips.',
+                'category': 'Software',
+                'device_type': 'Laptop/Desktop',
+                'os': 'Windows 11',
+                'urgency': 'medium',
+                'solution': '''Step 1: Download Python Installer
+• Visit python.org/downloads
+• Click "Download Python 3.11.x"
+
+Step 2: Run Installer
+• Double-click the installer
+• Check "Add python.exe to PATH"
+
+Step 3: Verify Installation
+• Open Command Prompt
+• Type: python --version'''
+            },
+            {
+                'title': 'Fix "No Internet" on Connected WiFi',
+                'description': 'WiFi shows connected but websites won\'t load.',
+                'category': 'Network',
+                'device_type': 'Any Device',
+                'os': 'Windows/Mac/Android',
+                'urgency': 'high',
+                'solution': '''Step 1: Restart Devices
+• Restart router
+• Restart computer/phone
+
+Step 2: Check Other Devices
+• Try another device on same WiFi
+
+Step 3: Flush DNS Cache
+• Open Command Prompt as Admin
+• Type: ipconfig /flushdns'''
+            },
+            {
+                'title': 'Speed Up Slow Windows Computer',
+                'description': 'Windows running very slow after update.',
+                'category': 'Performance',
+                'device_type': 'Desktop',
+                'os': 'Windows 10/11',
+                'urgency': 'medium',
+                'solution': '''Step 1: Clean Disk Space
+• Open Disk Cleanup
+• Select C: drive
+
+Step 2: Disable Startup Programs
+• Open Task Manager
+• Go to Startup tab
+
+Step 3: Update Drivers
+• Open Device Manager
+• Update display drivers'''
+            },
+            {
+                'title': 'Install Printer Without Installation CD',
+                'description': 'Need to install HP printer but lost installation CD.',
+                'category': 'Hardware',
+                'device_type': 'Printer',
+                'os': 'Windows',
+                'urgency': 'medium',
+                'solution': '''Step 1: Connect Printer
+• Turn on printer
+• Connect to WiFi
+
+Step 2: Download Drivers
+• Go to HP.com/support
+• Download drivers
+
+Step 3: Add Printer in Windows
+• Open Settings → Devices
+• Click "Add printer"'''
+            }
+        ]
+
+        for i, prob_data in enumerate(problems_data):
+            problem = Problem(
+                title=prob_data['title'],
+                description=prob_data['description'],
+                category=prob_data['category'],
+                device_type=prob_data['device_type'],
+                operating_system=prob_data['os'],
+                urgency=prob_data['urgency'],
+                user_id=helper.id if i % 2 == 0 else test_user.id
+            )
+            db.session.add(problem)
+            db.session.commit()
+
+            solution = Solution(
+                title=f'Solution for {prob_data["title"]}',
+                steps=prob_data['solution'],
+                difficulty='Beginner',
+                estimated_time='10-20 minutes',
+                is_verified=True,
+                problem_id=problem.id,
+                user_id=helper.id
+            )
+            db.session.add(solution)
+            db.session.flush()
+            # A real vote: the triggers count it and credit the helper's reputation
+            db.session.add(Vote(user_id=test_user.id, solution_id=solution.id, value=1))
+
+        db.session.commit()
+        invalidate_listings()
+        flash('✅ 4 real problems with solutions added!', 'success')
+        flash('👤 Test accounts: techhelper/help123 and testuser/test123', 'info')
+
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error: {str(e)}', 'danger')
+
+    return redirect(url_for('main.home'))
+
+# ==================== REPUTATION ====================
+def leaderboard_query(category=None, limit=LEADERBOARD_SIZE):
+    """Top helpers as (user id, username, reputation) rows, read straight off a reputation index"""
+    if category:
+        return (db.session.query(User.id, User.username, CategoryReputation.reputation)
+                .join(CategoryReputation, CategoryReputation.user_id == User.id)
+                .filter(CategoryReputation.category == category, CategoryReputation.reputation > 0)
+                .order_by(CategoryReputation.reputation.desc(), CategoryReputation.user_id.desc())
+                .limit(limit))
+    return (db.session.query(User.id, User.username, User.reputation)
+            .filter(User.reputation > 0)
+            .order_by(User.reputation.desc(), User.id.desc())
+            .limit(limit))
+
+@bp.route('/leaderboard')
+def leaderboard():
+    category = request.args.get('category', '')
+    return render_template('leaderboard.html',
+                           title='Leaderboard',
+                           leaders=leaderboard_query(category).all(),
+                           categories=get_categories(),
+                           selected_category=category)
+
+# ==================== ABOUT & CONTACT ====================
+@bp.route('/about')
+@cached_page
+def about():
+    return render_template('about.html', title='About Us')
+
+@bp.route('/contact')
+def contact():
+    return render_template('contact.html', title='Contact Us')
@@ -0,0 +1,142 @@
+from datetime import datetime
+
+from flask_login import UserMixin
+from sqlalchemy import func
+from sqlalchemy.orm import defer, validates, with_expression
+from werkzeug.security import check_password_hash
+
+import migrations
+from .extensions import db, login_manager
+from .passwords import hash_password
+
+
+class User(UserMixin, db.Model):
+    __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_reputation', 'reputation', 'id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(128), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    is_helper = db.Column(db.Boolean, default=False)
+    reputation = db.Column(db.Integer, default=0)
+    profile_pic = db.Column(db.String(80))  # stored file name, see images.py
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def set_password(self, password):
+        self.password_hash = hash_password(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+class Problem(db.Model):
+    __tablename__ = 'problems'
+    # One index per listing order (see browse/home/profile); id breaks ties for keyset paging
+    __table_args__ = (
+        db.Index('ix_problems_created_at', 'created_at', 'id'),
+        db.Index('ix_problems_views', 'views', 'id'),
+        db.Index('ix_problems_solution_count', 'solution_count', 'id'),
+        db.Index('ix_problems_is_solved_created_at', 'is_solved', 'created_at', 'id'),
+        db.Index('ix_problems_category_created_at', 'category', 'created_at', 'id'),
+        db.Index('ix_problems_category_is_solved_created_at', 'category', 'is_solved', 'created_at', 'id'),
+        db.Index('ix_problems_category_views', 'category', 'views', 'id'),
+        db.Index('ix_problems_category_solution_count', 'category', 'solution_count', 'id'),
+        db.Index('ix_problems_user_id_created_at', 'user_id', 'created_at', 'id'),
+        db.Index('ix_problems_updated_at', 'updated_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    category = db.Column(db.String(50))
+    device_type = db.Column(db.String(50))
+    operating_system = db.Column(db.String(50))
+    urgency = db.Column(db.String(20), default='medium')
+    is_solved = db.Column(db.Boolean, default=False)
+    views = db.Column(db.Integer, default=0)
+    solution_count = db.Column(db.Integer, default=0)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    author = db.relationship('User', backref='user_problems')
+    solutions = db.relationship('Solution', backref='problem', lazy=True, cascade="all, delete-orphan",
+                                order_by='(Solution.created_at, Solution.id)')
+
+    # Start of the description, loaded by list views in place of the full text
+    snippet = db.query_expression()
+
+    def __repr__(self):
+        return f'<Problem {self.title}>'
+
+def parse_steps(steps):
+    """Split solution text into its non-blank, stripped lines"""
+    return [line.strip() for line in (steps or '').splitlines() if line.strip()]
+
+class Solution(db.Model):
+    __tablename__ = 'solutions'
+    __table_args__ = (
+        db.Index('ix_solutions_problem_id_created_at', 'problem_id', 'created_at', 'id'),
+        db.Index('ix_solutions_user_id', 'user_id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    steps = db.Column(db.Text, nullable=False)
+    parsed_steps = db.Column(db.JSON)  # parse_steps(steps), filled in whenever steps is set
+    difficulty = db.Column(db.String(20), default='Beginner')
+    estimated_time = db.Column(db.String(20))
+    upvotes = db.Column(db.Integer, default=0)
+    downvotes = db.Column(db.Integer, default=0)
+    helpful_score = db.Column(db.Float, db.Computed(migrations.HELPFUL_SCORE_SQL, persisted=False))
+    is_verified = db.Column(db.Boolean, default=False)
+    problem_id = db.Column(db.Integer, db.ForeignKey('problems.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    author = db.relationship('User', backref='user_solutions')
+    votes = db.relationship('Vote', backref='solution', lazy=True, cascade="all, delete-orphan")
+
+    @validates('steps')
+    def validate_steps(self, key, steps):
+        self.parsed_steps = parse_steps(steps)
+        return steps
+
+    @property
+    def step_list(self):
+        return self.parsed_steps if self.parsed_steps is not None else parse_steps(self.steps)
+
+class Vote(db.Model):
+    __tablename__ = 'votes'
+    __table_args__ = (
+        db.Index('ix_votes_solution_id', 'solution_id'),
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    solution_id = db.Column(db.Integer, db.ForeignKey('solutions.id'), primary_key=True)
+    value = db.Column(db.Integer, nullable=False)  # 1 = helpful, -1 = not helpful
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class CategoryReputation(db.Model):
+    """A user's reputation earned within one problem category (maintained by triggers)"""
+    __tablename__ = 'category_reputation'
+    __table_args__ = (
+        db.Index('ix_category_reputation_category', 'category', 'reputation', 'user_id'),
+        db.Index('ix_category_reputation_user_id', 'user_id', 'reputation', 'category'),
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    reputation = db.Column(db.Integer, nullable=False, default=0)
+
+    user = db.relationship('User')
+
+SNIPPET_LENGTH = 200
+
+def with_snippet():
+    """Loader options for list views: skip the full description, load a snippet instead"""
+    return (defer(Problem.description),
+            with_expression(Problem.snippet, func.substr(Problem.description, 1, SNIPPET_LENGTH + 1)))
+
+@login_manager.user_loader
+def load_user(user_id):
+    return User.query.get(int(user_id))
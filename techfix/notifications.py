@@ -0,0 +1,47 @@
+from flask import current_app, url_for
+from flask_mail import Message
+from sqlalchemy.orm import joinedload
+
+from .extensions import db, jobs, mail, task
+from .models import Solution, User
+
+
+def job_context(app):
+    """Jobs run outside any request; give each one so url_for can build absolute links"""
+    return lambda: app.test_request_context(base_url=app.config['SITE_URL'])
+
+
+def merge_solution_ids(pending, new):
+    pending['solution_ids'] = sorted(set(pending['solution_ids']) | set(new['solution_ids']))
+    return pending
+
+
+def notify_new_solution(problem, solution):
+    """Queue a digest email to the problem's author; never fails the request"""
+    if problem.user_id == solution.user_id:
+        return
+    try:
+        jobs.enqueue('notify_new_solutions',
+                     {'user_id': problem.user_id, 'solution_ids': [solution.id]},
+                     delay=current_app.config['NOTIFY_DIGEST_DELAY'],
+                     dedupe_key=f'notify_new_solutions:{problem.user_id}')
+    except Exception:
+        current_app.logger.exception('Could not queue notification for solution %s', solution.id)
+
+
+@task('notify_new_solutions', merge=merge_solution_ids)
+def send_new_solutions_digest(payload):
+    user = db.session.get(User, payload['user_id'])
+    solutions = (Solution.query.options(joinedload(Solution.author), joinedload(Solution.problem))
+                 .filter(Solution.id.in_(payload['solution_ids']))
+                 .order_by(Solution.created_at).all())
+    if user is None or not solutions:
+        return
+
+    lines = [f'Hi {user.username},', '', 'New solutions were posted to your problems:', '']
+    for solution in solutions:
+        link = url_for('problems.problem_detail', problem_id=solution.problem_id, _external=True)
+        lines.append(f'• "{solution.problem.title}" — {solution.author.username}: {link}')
+    subject = ('A new solution to your problem' if len(solutions) == 1
+               else f'{len(solutions)} new solutions to your problems')
+    mail.send(Message(subject=subject, recipients=[user.email], body='\n'.join(lines)))
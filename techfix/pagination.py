@@ -0,0 +1,56 @@
+"""Keyset ("seek") pagination: each page continues after the sort key of the last
+row of the previous one, so deep pages cost the same as the first.
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import tuple_
+
+from .extensions import db
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Return the sort key stored in a cursor, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            return None
+        return [datetime.fromisoformat(value) if isinstance(col.type, db.DateTime) and value else value
+                for col, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        return None
+
+
+def get_page_size():
+    per_page = request.args.get('per_page', current_app.config['PAGE_SIZE'], type=int)
+    return max(1, min(per_page, current_app.config['MAX_PAGE_SIZE']))
+
+
+def keyset_query(query, columns, descending, cursor, per_page):
+    """The query for one page, fetching one extra row to detect whether another page follows"""
+    after = decode_cursor(cursor, columns)
+    if after is not None:
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*after) if descending else key > tuple_(*after))
+    query = query.order_by(*(col.desc() if descending else col.asc() for col in columns))
+    return query.add_columns(*columns).limit(per_page + 1)
+
+
+def keyset_paginate(query, columns, descending=True, cursor=None, per_page=None):
+    """Fetch one page of `query` ordered by `columns` (the last must be unique).
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    per_page = per_page or get_page_size()
+    rows = keyset_query(query, columns, descending, cursor, per_page).all()
+    next_cursor = encode_cursor(rows[per_page - 1][1:]) if len(rows) > per_page else None
+    return [row[0] for row in rows[:per_page]], next_cursor
@@ -0,0 +1,43 @@
+"""Password hashing with the configured PASSWORD_HASH_METHOD.
+
+Hashing is deliberately slow, so logins for unknown users check against a
+dummy hash instead of returning early (which would reveal which usernames
+exist by timing), and stored hashes made with older parameters are replaced
+transparently the next time their owner logs in.
+"""
+import secrets
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from .extensions import db
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def dummy_hash():
+    """A hash of a random password, made once per app with the configured method"""
+    hashed = current_app.extensions.get('techfix.dummy_hash')
+    if hashed is None:
+        hashed = current_app.extensions['techfix.dummy_hash'] = hash_password(secrets.token_hex(16))
+    return hashed
+
+
+def hash_parameters(hashed):
+    """The method and parameters part of a stored hash, e.g. 'pbkdf2:sha256:600000'"""
+    return hashed.split('$', 1)[0]
+
+
+def verify_password(user, password):
+    """Check a login attempt for `user` (None if no such user), in about constant time"""
+    if user is None:
+        check_password_hash(dummy_hash(), password)
+        return False
+    if not check_password_hash(user.password_hash, password):
+        return False
+    if hash_parameters(user.password_hash) != hash_parameters(dummy_hash()):
+        user.password_hash = hash_password(password)
+        db.session.commit()
+    return True
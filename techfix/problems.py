@@ -0,0 +1,131 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload, selectinload
+
+from .caching import cached_page, get_categories, invalidate_listings
+from .database import apply_search
+from .extensions import db, view_counter
+from .models import Problem, Solution, User, with_snippet
+from .pagination import keyset_paginate
+from .related_problems import RELATED_FIELDS, RELATED_LIMIT, load_related, related_index, related_problems
+
+bp = Blueprint('problems', __name__)
+
+
+@bp.route('/submit', methods=['GET', 'POST'])
+@login_required
+def submit_problem():
+    if request.method == 'POST':
+        title = request.form['title']
+        description = request.form['description']
+        category = request.form['category']
+        device_type = request.form.get('device_type', '')
+        operating_system = request.form.get('operating_system', '')
+        urgency = request.form.get('urgency', 'medium')
+
+        new_problem = Problem(
+            title=title,
+            description=description,
+            category=category,
+            device_type=device_type,
+            operating_system=operating_system,
+            urgency=urgency,
+            user_id=current_user.id
+        )
+
+        try:
+            db.session.add(new_problem)
+            db.session.commit()
+            invalidate_listings()
+            flash('🎉 Problem submitted successfully!', 'success')
+            return redirect(url_for('problems.problem_detail', problem_id=new_problem.id))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error: {str(e)}', 'danger')
+
+    return render_template('submit_problem.html', title='Submit Problem')
+
+@bp.route('/problem/<int:problem_id>')
+def problem_detail(problem_id):
+    problem = Problem.query.options(
+        joinedload(Problem.author),
+        selectinload(Problem.solutions).joinedload(Solution.author),
+    ).get_or_404(problem_id)
+    view_counter.increment(problem_id)
+    return render_template('problem_detail.html', title=problem.title, problem=problem,
+                           views=problem.views + view_counter.pending(problem_id),
+                           related=related_problems(problem))
+
+@bp.route('/problems/similar')
+def similar_problems():
+    """Problems resembling a draft, for live duplicate suggestions while submitting"""
+    fields = {name: request.args.get(name, '')[:5000] for name in RELATED_FIELDS}
+    matches = related_index().search(fields, k=RELATED_LIMIT, min_score=0.15)
+    scores = dict(matches)
+    return jsonify(problems=[{
+        'id': problem.id,
+        'title': problem.title,
+        'url': url_for('problems.problem_detail', problem_id=problem.id),
+        'is_solved': problem.is_solved,
+        'solution_count': problem.solution_count,
+        'score': scores[problem.id],
+    } for problem in load_related(matches)])
+
+# ==================== BROWSE WITH SEARCH & FILTERS ====================
+def browse_query(search_query, category, sort_by, query=None):
+    """Filtered browse query plus the (sort key, descending) it pages on"""
+    # Start with base query (what the browse page shows, unless given one)
+    if query is None:
+        query = Problem.query.options(*with_snippet(),
+                                      joinedload(Problem.author).load_only(User.id, User.username))
+
+    # Apply search filter
+    relevance = None
+    if search_query:
+        query, relevance = apply_search(query, search_query)
+
+    # Apply category filter
+    if category:
+        query = query.filter_by(category=category)
+
+    # Apply sorting (the id tiebreaker keeps page boundaries stable)
+    descending = True
+    if sort_by == 'views':
+        sort_key = (Problem.views, Problem.id)
+    elif sort_by == 'solutions':
+        sort_key = (Problem.solution_count, Problem.id)
+    elif sort_by == 'unsolved':
+        query = query.filter_by(is_solved=False)
+        sort_key = (Problem.created_at, Problem.id)
+    elif sort_by == 'relevance' and relevance is not None:
+        sort_key = (relevance, Problem.id)
+        descending = False
+    else:  # newest
+        sort_key = (Problem.created_at, Problem.id)
+
+    return query, sort_key, descending
+
+@bp.route('/browse')
+@cached_page
+def browse():
+    # Get query parameters
+    search_query = request.args.get('search', '')
+    category = request.args.get('category', '')
+    sort_by = request.args.get('sort') or ('relevance' if search_query else 'newest')
+
+    query, sort_key, descending = browse_query(search_query, category, sort_by)
+    problems, next_cursor = keyset_paginate(query, sort_key, descending=descending,
+                                            cursor=request.args.get('cursor'))
+
+    # Get unique categories for filter
+    categories = get_categories()
+
+    return render_template('browse.html',
+                          title='Browse Problems',
+                          problems=problems,
+                          search_query=search_query,
+                          current_category=category,
+                          sort_by=sort_by,
+                          categories=categories,
+                          cursor=request.args.get('cursor'),
+                          next_cursor=next_cursor)
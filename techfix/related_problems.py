@@ -0,0 +1,137 @@
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy.orm import load_only
+
+from backends import ProcessThread
+from related import SimilarityIndex
+from .caching import listings_version
+from .extensions import cache, db
+from .models import Problem
+
+RELATED_FIELDS = ('title', 'description', 'category', 'device_type', 'operating_system')
+RELATED_LIMIT = 5
+# Rows are picked up by updated_at, which is stamped before the row commits; looking
+# this far back catches rows another worker committed late
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+def reindex_related():
+    """Have every worker rebuild its index from scratch.
+
+    For bulk writes that keep the updated_at of the rows they change (import-data).
+    """
+    cache.set('related:generation', time.time_ns(), timeout=0)
+
+
+class RelatedProblems:
+    """An app's similarity index over problems, kept in sync by a thread in each worker.
+
+    Requests only read the index. The thread syncs it every RELATED_SYNC_INTERVAL
+    seconds, and as soon as a request sees a new listings version (a problem was
+    posted through this worker). With RELATED_EAGER the request syncs instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.index = SimilarityIndex(weights={'title': 3})
+        self.version = None         # listings version at the last sync
+        self.generation = None      # reindex_related() stamp the index was built after
+        self.changed_since = None   # newest updated_at indexed
+        self.synced_at = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._syncer = ProcessThread(self._run, 'related-sync')
+
+    @property
+    def sync_interval(self):
+        return self.app.config['RELATED_SYNC_INTERVAL']
+
+    def due(self):
+        return (self.synced_at is None or listings_version() != self.version
+                or time.monotonic() - self.synced_at >= self.sync_interval)
+
+    def request_sync(self):
+        """Ask for a sync if one is due, without waiting for it"""
+        if self.app.config['RELATED_EAGER']:
+            if self.due():
+                self.sync()
+            return
+        self._syncer.start()
+        if listings_version() != self.version:
+            self._wake.set()
+
+    def sync(self):
+        """Bring the index up to date with the problems table.
+
+        Problems added or edited since the last sync, by this or any other
+        worker, are (re)indexed by their updated_at. Deleted ones leave no row
+        behind, so they are found by comparing ids whenever the row count and
+        the index size disagree. After reindex_related() the index is rebuilt
+        on the side and swapped in whole.
+        """
+        with self._lock:
+            version = listings_version()
+            generation = cache.get('related:generation')
+            index, since = self.index, self.changed_since
+            if since is None or generation != self.generation:
+                index = SimilarityIndex(weights={'title': 3})
+            changed = db.select(Problem.id, Problem.updated_at, *(getattr(Problem, name) for name in RELATED_FIELDS))
+            if index is self.index:
+                changed = changed.where(Problem.updated_at >= since - SYNC_OVERLAP)
+            since = self._add(index, changed, since)
+
+            if db.session.scalar(db.select(db.func.count()).select_from(Problem)) != len(index):
+                ids = set(db.session.scalars(db.select(Problem.id)))
+                for doc_id in set(index) - ids:
+                    index.remove(doc_id)
+                missing = ids.difference(index)
+                if missing:
+                    since = self._add(index, changed.where(Problem.id.in_(missing)), since)
+
+            self.index, self.changed_since = index, since
+            self.version, self.generation = version, generation
+            self.synced_at = time.monotonic()
+
+    @staticmethod
+    def _add(index, query, since):
+        for row in db.session.execute(query):
+            index.add(row.id, {name: getattr(row, name) for name in RELATED_FIELDS})
+            if row.updated_at is not None and (since is None or row.updated_at > since):
+                since = row.updated_at
+        return since
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    if self.due():
+                        self.sync()
+            except Exception:
+                self.app.logger.exception('Could not sync the related-problems index')
+            self._wake.wait(self.sync_interval)
+            self._wake.clear()
+
+
+def related_index():
+    """The current app's index; empty until the worker's first sync"""
+    related = current_app.extensions['techfix.related']
+    related.request_sync()
+    return related.index
+
+
+def load_related(matches):
+    """Problems for (id, score) matches, in match order"""
+    if not matches:
+        return []
+    problems = Problem.query.options(
+        load_only(Problem.id, Problem.title, Problem.is_solved, Problem.solution_count)
+    ).filter(Problem.id.in_([problem_id for problem_id, _ in matches])).all()
+    by_id = {problem.id: problem for problem in problems}
+    return [by_id[problem_id] for problem_id, _ in matches if problem_id in by_id]
+
+
+def related_problems(problem, k=RELATED_LIMIT):
+    return load_related(related_index().similar(problem.id, k))
@@ -0,0 +1,184 @@
+from datetime import datetime
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask_login import login_required, current_user
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload
+
+from .caching import invalidate_listings
+from .extensions import db
+from .live import publish_solution, publish_verified, publish_votes, solution_payload
+from .models import Problem, Solution, Vote
+from .notifications import notify_new_solution
+
+bp = Blueprint('solutions', __name__)
+
+
+def on_solution_added(problem, solution):
+    """Side effects of a committed new solution"""
+    invalidate_listings()
+    notify_new_solution(problem, solution)
+    publish_solution(problem, solution)
+
+@bp.route('/problem/<int:problem_id>/add-solution', methods=['GET', 'POST'])
+@login_required
+def add_solution(problem_id):
+    problem = Problem.query.get_or_404(problem_id)
+
+    if request.method == 'POST':
+        title = request.form.get('title', f'Solution by {current_user.username}')
+        steps = request.form['steps']
+        difficulty = request.form.get('difficulty', 'Beginner')
+        estimated_time = request.form.get('estimated_time', '')
+
+        new_solution = Solution(
+            title=title,
+            steps=steps,
+            difficulty=difficulty,
+            estimated_time=estimated_time,
+            problem_id=problem_id,
+            user_id=current_user.id
+        )
+
+        try:
+            db.session.add(new_solution)
+            db.session.commit()
+            on_solution_added(problem, new_solution)
+            flash('✅ Solution added successfully!', 'success')
+            return redirect(url_for('problems.problem_detail', problem_id=problem_id))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error: {str(e)}', 'danger')
+
+    return render_template('add_solution.html',
+                          title=f'Add Solution: {problem.title}',
+                          problem=problem)
+
+# ==================== QUICK SOLUTION (COMMENT-STYLE) ====================
+@bp.route('/problem/<int:problem_id>/quick-solution', methods=['POST'])
+@login_required
+def quick_solution(problem_id):
+    """Post a solution from the problem page; answers in JSON when asked to (the page's script does)"""
+    problem = Problem.query.get_or_404(problem_id)
+    wants_json = request.accept_mimetypes.best == 'application/json'
+
+    if problem.user_id == current_user.id:
+        if wants_json:
+            return jsonify(error="You can't add a solution to your own problem."), 403
+        flash("You can't add a solution to your own problem.", 'warning')
+        return redirect(url_for('problems.problem_detail', problem_id=problem_id))
+
+    steps = request.form.get('steps', '').strip()
+    if not steps:
+        if wants_json:
+            return jsonify(error='Please provide solution steps.'), 400
+        flash('Please provide solution steps.', 'danger')
+        return redirect(url_for('problems.problem_detail', problem_id=problem_id))
+
+    new_solution = Solution(
+        title=f'Solution by {current_user.username}',
+        steps=steps,
+        difficulty=request.form.get('difficulty', 'Beginner'),
+        estimated_time=request.form.get('estimated_time', ''),
+        problem_id=problem_id,
+        user_id=current_user.id
+    )
+
+    try:
+        db.session.add(new_solution)
+        db.session.commit()
+        on_solution_added(problem, new_solution)
+        if wants_json:
+            return jsonify(solution_payload(problem, new_solution)), 201
+        flash('✅ Your solution has been posted!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        if wants_json:
+            return jsonify(error=f'Error: {str(e)}'), 500
+        flash(f'Error: {str(e)}', 'danger')
+
+    return redirect(url_for('problems.problem_detail', problem_id=problem_id))
+
+# ==================== VOTING SYSTEM ====================
+VOTE_VALUES = {'up': 1, 'down': -1}
+
+SELF_VOTE_MESSAGE = "You can't vote on your own solution."
+
+def record_vote(solution, value):
+    """Insert or change the current user's vote on someone else's solution.
+
+    One upsert statement, no read-modify-write: repeat votes are no-ops and the
+    votes triggers adjust the solution's counters in the same transaction.
+    """
+    stmt = sqlite_insert(Vote).values(user_id=current_user.id, solution_id=solution.id,
+                                      value=value, created_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Vote.user_id, Vote.solution_id],
+        set_={'value': stmt.excluded.value},
+        where=Vote.value != stmt.excluded.value,
+    )
+    db.session.execute(stmt)
+    db.session.commit()
+    publish_votes(solution)     # reloads the tallies the triggers just updated
+
+def requested_vote():
+    """The 'up'/'down' value from the form or a JSON object body, as +1/-1; None if missing or malformed"""
+    value = request.form.get('value')
+    if value is None:
+        payload = request.get_json(silent=True)
+        value = payload.get('value') if isinstance(payload, dict) else None
+    return VOTE_VALUES.get(value) if isinstance(value, str) else None
+
+@bp.route('/solution/<int:solution_id>/vote', methods=['POST'])
+@login_required
+def vote_solution(solution_id):
+    solution = Solution.query.get_or_404(solution_id)
+    value = requested_vote()
+    if value is None:
+        return jsonify(error="value must be 'up' or 'down'"), 400
+    if solution.user_id == current_user.id:
+        return jsonify(error=SELF_VOTE_MESSAGE), 403
+    record_vote(solution, value)
+    return jsonify(solution_id=solution.id,
+                   vote=value,
+                   upvotes=solution.upvotes,
+                   downvotes=solution.downvotes,
+                   helpful_score=solution.helpful_score)
+
+@bp.route('/solution/<int:solution_id>/upvote', methods=['POST'])
+@login_required
+def upvote_solution(solution_id):
+    solution = Solution.query.get_or_404(solution_id)
+    if solution.user_id == current_user.id:
+        flash(SELF_VOTE_MESSAGE, 'warning')
+    else:
+        record_vote(solution, VOTE_VALUES['up'])
+        flash('👍 Thanks for your vote!', 'success')
+    return redirect(url_for('problems.problem_detail', problem_id=solution.problem_id))
+
+@bp.route('/solution/<int:solution_id>/downvote', methods=['POST'])
+@login_required
+def downvote_solution(solution_id):
+    solution = Solution.query.get_or_404(solution_id)
+    if solution.user_id == current_user.id:
+        flash(SELF_VOTE_MESSAGE, 'warning')
+    else:
+        record_vote(solution, VOTE_VALUES['down'])
+        flash('👎 Vote recorded.', 'info')
+    return redirect(url_for('problems.problem_detail', problem_id=solution.problem_id))
+
+# ==================== VERIFICATION ====================
+@bp.route('/solution/<int:solution_id>/verify', methods=['POST'])
+@login_required
+def verify_solution(solution_id):
+    """Let the problem's author mark a solution as the one that worked (or unmark it)"""
+    solution = Solution.query.options(joinedload(Solution.problem)).get_or_404(solution_id)
+    if solution.problem.user_id != current_user.id:
+        flash('Only the person who asked can verify a solution.', 'warning')
+        return redirect(url_for('problems.problem_detail', problem_id=solution.problem_id))
+
+    solution.is_verified = not solution.is_verified
+    db.session.commit()  # the reputation triggers credit (or debit) the author
+    publish_verified(solution)
+    flash('✅ Solution marked as verified!' if solution.is_verified else 'Verification removed.', 'success')
+    return redirect(url_for('problems.problem_detail', problem_id=solution.problem_id))
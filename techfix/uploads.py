@@ -0,0 +1,69 @@
+import os
+
+from flask import Blueprint, current_app, redirect, url_for, flash, request
+from flask_login import login_required, current_user
+
+import images
+from .extensions import db, jobs, task
+from .models import User
+
+bp = Blueprint('uploads', __name__)
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+@bp.app_template_global()
+def profile_pic_url(user, size=150):
+    """URL of the user's picture: the WebP thumbnail once rendered, else the original"""
+    if not user.profile_pic:
+        return None
+    name = images.thumbnail_name(user.profile_pic, size)
+    if not os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], name)):
+        name = user.profile_pic
+    return url_for('static', filename='uploads/profile_pics/' + name)
+
+@task('make_thumbnails')
+def make_thumbnails_job(payload):
+    images.make_thumbnails(current_app.config['UPLOAD_FOLDER'], payload['filename'])
+
+@task('collect_profile_pics')
+def collect_profile_pics_job(payload=None):
+    referenced = [name for (name,) in db.session.query(User.profile_pic).filter(User.profile_pic.isnot(None))]
+    return images.collect_garbage(current_app.config['UPLOAD_FOLDER'], referenced)
+
+@bp.route('/upload-profile-pic', methods=['POST'])
+@login_required
+def upload_profile_pic():
+    file = request.files.get('profile_pic')
+    if file is None or file.filename == '':
+        flash('No file selected', 'danger')
+        return redirect(url_for('auth.profile', username=current_user.username))
+
+    if not allowed_file(file.filename):
+        flash('Invalid file type. Allowed: PNG, JPG, JPEG, GIF', 'danger')
+        return redirect(url_for('auth.profile', username=current_user.username))
+
+    try:
+        filename = images.store_upload(file.stream, current_app.config['UPLOAD_FOLDER'])
+    except images.InvalidImage:
+        flash('That file is not a valid image.', 'danger')
+        return redirect(url_for('auth.profile', username=current_user.username))
+
+    previous = current_user.profile_pic
+    current_user.profile_pic = filename
+    db.session.commit()
+
+    # Thumbnails and cleanup of the old picture happen off the request thread. Neither is needed
+    # for the upload to succeed: pages show the original until thumbnails exist, and a later
+    # upload or `flask gc-uploads` removes the old file
+    try:
+        jobs.enqueue('make_thumbnails', {'filename': filename})
+        if previous and previous != filename:
+            jobs.enqueue('collect_profile_pics', dedupe_key='collect_profile_pics', delay=3600)
+    except Exception:
+        current_app.logger.exception('Could not queue image jobs for profile picture %s', filename)
+
+    flash('✅ Profile picture updated successfully!', 'success')
+    return redirect(url_for('auth.profile', username=current_user.username))
@@ -0,0 +1,57 @@
+import atexit
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import text
+
+from backends import ProcessThread
+from .extensions import db
+
+
+class ViewCounter:
+    """Write-behind buffer for problem views.
+
+    Page views only bump an in-memory counter; pending counts are written as
+    atomic `views = views + n` updates in one transaction by a background
+    thread, when the threshold is reached, and at interpreter shutdown.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flusher = ProcessThread(self._run, 'view-counter')
+        atexit.register(self.flush)
+
+    def increment(self, problem_id):
+        with self._lock:
+            if self._flusher.start():
+                self._pending.clear()   # views a forked worker's parent already counted
+            self._pending[problem_id] += 1
+            full = sum(self._pending.values()) >= self.app.config['VIEW_FLUSH_THRESHOLD']
+        if full:
+            self.flush()
+
+    def pending(self, problem_id):
+        """Views counted by this process but not yet written"""
+        return self._pending.get(problem_id, 0)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        if not batch:
+            return
+        try:
+            with self.app.app_context(), db.engine.begin() as conn:
+                conn.execute(text("UPDATE problems SET views = views + :n WHERE id = :id"),
+                             [{'id': problem_id, 'n': n} for problem_id, n in batch.items()])
+        except Exception:
+            self.app.logger.exception('Could not flush %d buffered views', sum(batch.values()))
+            with self._lock:
+                self._pending.update(batch)
+
+    def _run(self):
+        while True:
+            time.sleep(self.app.config['VIEW_FLUSH_INTERVAL'])
+            self.flush()
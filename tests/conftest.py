@@ -0,0 +1,79 @@
+"""Fixtures: an isolated app on an in-memory database, seeded with a little of everything"""
+import pytest
+
+from techfix import create_app, upgrade_database
+from techfix.extensions import db
+from techfix.models import Problem, Solution, User, Vote
+
+PASSWORD = 'correct horse'
+
+
+def make_app(tmp_path, **config):
+    """A fresh app with an empty, fully migrated in-memory database; `config` overrides the test settings"""
+    app = create_app({
+        'TESTING': True,
+        'SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'JOBS_DATABASE': str(tmp_path / 'jobs.db'),
+        'JOBS_EAGER': True,
+        'RATELIMIT_BACKEND': 'null',
+        'LIVE_BACKEND': 'memory',
+        'VIEW_FLUSH_THRESHOLD': 10 ** 6,    # keep view counts buffered
+        'VIEW_FLUSH_INTERVAL': 10 ** 6,
+        'RELATED_EAGER': True,              # sync the related index on the request
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        **config,
+    })
+    with app.app_context():
+        upgrade_database()
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    return make_app(tmp_path)
+
+
+@pytest.fixture
+def seeded(app):
+    """Three users, problems in two categories with solutions and votes; returns their ids"""
+    with app.app_context():
+        users = []
+        for name in ('alice', 'bob', 'carol'):
+            user = User(username=name, email=f'{name}@example.com', is_helper=name != 'alice')
+            user.set_password(PASSWORD)
+            users.append(user)
+        db.session.add_all(users)
+        db.session.flush()
+
+        problems = []
+        for i in range(6):
+            problems.append(Problem(title=f'Windows wifi drops #{i}' if i % 2 else f'Printer jams #{i}',
+                                    description='The connection keeps dropping after sleep.\nTried restarting.',
+                                    category='Software' if i % 2 else 'Hardware', device_type='Laptop',
+                                    operating_system='Windows 11', user_id=users[0].id))
+        db.session.add_all(problems)
+        db.session.flush()
+
+        solutions = []
+        for problem in problems[:4]:
+            for author in users[1:]:
+                solutions.append(Solution(title=f'Fix by {author.username}', steps='Update the driver\nReboot',
+                                          problem_id=problem.id, user_id=author.id))
+        db.session.add_all(solutions)
+        db.session.flush()
+        db.session.add_all([Vote(user_id=users[0].id, solution_id=solution.id, value=1)
+                            for solution in solutions])
+        db.session.commit()
+        return {
+            'users': {user.username: user.id for user in users},
+            'problems': [problem.id for problem in problems],
+            'solutions': [solution.id for solution in solutions],
+        }
+
+
+def log_in(client, user_id):
+    """Log the test client in as `user_id` without going through the (slow) login form"""
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
@@ -0,0 +1,67 @@
+import pytest
+
+from techfix.extensions import db
+from techfix.models import Vote
+
+from conftest import make_app
+
+
+def test_unchanged_resource_answers_304(app, seeded):
+    client = app.test_client()
+    url = f"/api/v1/solutions/{seeded['solutions'][0]}"
+    first = client.get(url)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag.startswith('W/')
+
+    again = client.get(url, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_etag_changes_with_the_data_and_the_fields(app, seeded):
+    client = app.test_client()
+    solution_id = seeded['solutions'][0]
+    url = f'/api/v1/solutions/{solution_id}'
+    etag = client.get(url).headers['ETag']
+    assert client.get(url + '?fields=id,upvotes', headers={'If-None-Match': etag}).status_code == 200
+
+    with app.app_context():
+        db.session.add(Vote(user_id=seeded['users']['carol'], solution_id=solution_id, value=1))
+        db.session.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['upvotes'] == 2
+
+
+def test_fields_projection(app, seeded):
+    client = app.test_client()
+    listing = client.get('/api/v1/problems').get_json()['problems']
+    assert 'description' not in listing[0] and 'title' in listing[0]
+
+    problems = client.get('/api/v1/problems?fields=id,title').get_json()['problems']
+    assert {tuple(problem) for problem in problems} == {('id', 'title')}
+    assert set(client.get(f"/api/v1/problems/{seeded['problems'][0]}").get_json()) >= {'description', 'title'}
+
+    response = client.get('/api/v1/problems?fields=id,password_hash')
+    assert response.status_code == 400
+    assert 'password_hash' in response.get_json()['error']
+
+
+def test_batch_keeps_the_order_asked_for(app, seeded):
+    first, second, third = seeded['problems'][:3]
+    response = app.test_client().get(f'/api/v1/problems?ids={third},{first},999,{third},{second}&fields=id')
+    assert response.get_json() == {'problems': [{'id': third}, {'id': first}, {'id': second}]}
+
+
+@pytest.mark.parametrize('ids, status', [('1,2,3', 200), ('1,2,3,4', 400), ('1,x', 400), ('', 200)])
+def test_batch_limits(tmp_path, ids, status):
+    app = make_app(tmp_path, MAX_PAGE_SIZE=3)
+    response = app.test_client().get(f'/api/v1/users?ids={ids}')
+    assert response.status_code == status
+    if status == 400:
+        assert 'error' in response.get_json()
+
+
+def test_listing_solutions_needs_ids(app):
+    assert app.test_client().get('/api/v1/solutions').status_code == 400
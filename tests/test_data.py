@@ -0,0 +1,44 @@
+import json
+
+from techfix.data import import_records
+from techfix.extensions import db
+from techfix.models import CategoryReputation, Problem, Solution, User, Vote
+
+from conftest import make_app
+
+
+def snapshot():
+    return {
+        'votes': sorted(db.session.execute(db.select(Vote.user_id, Vote.solution_id, Vote.value)).all()),
+        'solutions': sorted(db.session.execute(db.select(Solution.id, Solution.upvotes, Solution.downvotes)).all()),
+        'reputation': sorted(db.session.execute(db.select(User.id, User.reputation)).all()),
+        'categories': sorted(db.session.execute(db.select(CategoryReputation.user_id, CategoryReputation.category,
+                                                          CategoryReputation.reputation)).all()),
+    }
+
+
+def test_export_import_round_trip(app, seeded, tmp_path):
+    path = tmp_path / 'data.jsonl'
+    result = app.test_cli_runner().invoke(args=['export-data', str(path)])
+    assert result.exit_code == 0, result.output
+    assert any(json.loads(line)['type'] == 'vote' for line in path.read_text().splitlines())
+    with app.app_context():
+        expected = snapshot()
+
+    copy = make_app(tmp_path / 'copy')
+    for _ in range(2):      # importing again changes nothing
+        result = copy.test_cli_runner().invoke(args=['import-data', str(path)])
+        assert result.exit_code == 0, result.output
+        with copy.app_context():
+            assert snapshot() == expected
+
+
+def test_import_leaves_missing_columns_alone(app, seeded):
+    problem_id = seeded['problems'][0]
+    with app.app_context():
+        before = db.session.get(Problem, problem_id)
+        description, category = before.description, before.category
+        import_records([{'type': 'problem', 'id': problem_id, 'title': 'Renamed'}], 100)
+        db.session.expire_all()
+        after = db.session.get(Problem, problem_id)
+        assert (after.title, after.description, after.category) == ('Renamed', description, category)
@@ -0,0 +1,58 @@
+import logging
+import time
+
+import pytest
+
+from jobs import JobQueue
+
+
+def merge_ids(pending, new):
+    return {'ids': sorted(set(pending['ids']) | set(new['ids']))}
+
+
+def failing(payload):
+    raise RuntimeError('boom')
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / 'jobs.db'), backoff=0, handlers={'digest': failing},
+                    mergers={'digest': merge_ids})
+
+
+def rows(queue):
+    return [tuple(row) for row in queue.db.connection().execute('SELECT status, payload FROM jobs ORDER BY id')]
+
+
+def test_retry_folds_into_pending_twin(queue):
+    queue.enqueue('digest', {'ids': [1]}, dedupe_key='digest:1')
+    job = queue.claim()
+    queue.enqueue('digest', {'ids': [2]}, dedupe_key='digest:1')
+    queue.run(job)
+    assert rows(queue) == [('superseded', '{"ids": [1]}'), ('pending', '{"ids": [1, 2]}')]
+
+
+def test_retry_without_twin_goes_back_to_pending(queue):
+    queue.enqueue('digest', {'ids': [1]}, dedupe_key='digest:1')
+    queue.run(queue.claim())
+    assert rows(queue) == [('pending', '{"ids": [1]}')]
+
+
+def test_orphaned_job_folds_into_pending_twin(queue):
+    queue.enqueue('digest', {'ids': [1]}, dedupe_key='digest:1')
+    queue.claim()
+    queue.enqueue('digest', {'ids': [2]}, dedupe_key='digest:1', delay=60)
+    queue.db.connection().execute('UPDATE jobs SET locked_at = ?', (time.time() - queue.lock_timeout - 1,))
+    assert queue.claim() is None
+    assert rows(queue) == [('superseded', '{"ids": [1]}'), ('pending', '{"ids": [1, 2]}')]
+
+
+def test_work_logs_errors_outside_the_handler(queue, caplog):
+    queue.enqueue('digest', {'ids': [1]})
+
+    def broken_context():
+        raise RuntimeError('no context')
+
+    with caplog.at_level(logging.ERROR, logger='jobs'):
+        queue.work(threads=1, context=broken_context, burst=True)
+    assert 'Worker thread failed running job 1 (digest)' in caplog.text
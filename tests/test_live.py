@@ -0,0 +1,83 @@
+import json
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from pubsub import MemoryBroker, SQLiteBroker
+
+from conftest import log_in
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def broker(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBroker()
+    return SQLiteBroker(str(tmp_path / 'live.db'), poll_interval=0.01)
+
+
+def test_subscribers_get_their_channel_only(broker):
+    with broker.subscribe('problem:1') as first, broker.subscribe('problem:2') as second:
+        event_id = broker.publish('problem:1', '{"type": "votes"}')
+        event = first.get(timeout=5)
+        assert (event.id, event.channel, event.data) == (event_id, 'problem:1', '{"type": "votes"}')
+        assert second.get(timeout=0.1) is None
+    assert broker.subscriber_count() == 0
+
+
+def test_reconnecting_subscriber_catches_up(broker):
+    seen = broker.publish('problem:1', 'a')
+    broker.publish('problem:2', 'b')
+    missed = broker.publish('problem:1', 'c')
+    with broker.subscribe('problem:1', last_id=seen) as subscription:
+        assert [event.id for event in subscription.drain()] == [missed]
+        live = broker.publish('problem:1', 'd')
+        assert subscription.get(timeout=5).id == live
+
+
+def test_sqlite_broker_delivers_events_from_other_processes(tmp_path):
+    path = str(tmp_path / 'live.db')
+    broker = SQLiteBroker(path, poll_interval=0.01)
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {str(ROOT)!r})
+        from pubsub import SQLiteBroker
+        print(SQLiteBroker({path!r}).publish('problem:1', 'from elsewhere'))
+    """)
+    with broker.subscribe('problem:1') as subscription:
+        output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+        event = subscription.get(timeout=5)
+    assert event is not None
+    assert (event.id, event.data) == (int(output), 'from elsewhere')
+
+
+def test_new_solution_is_published_to_the_problem_channel(app, seeded):
+    problem_id = seeded['problems'][4]
+    client = app.test_client()
+    log_in(client, seeded['users']['bob'])
+    with app.extensions['techfix.broker'].subscribe(f'problem:{problem_id}') as subscription:
+        client.post(f'/problem/{problem_id}/add-solution', data={'title': 'Reseat the cable', 'steps': 'Unplug\nPlug'})
+        payload = json.loads(subscription.get(timeout=5).data)
+    assert payload['type'] == 'solution'
+    assert payload['steps'] == ['Unplug', 'Plug'] and payload['solution_count'] == 1
+
+
+def test_wsgi_servers_are_told_not_to_stream(app, seeded):
+    url = f"/problem/{seeded['problems'][0]}/events"
+    response = app.test_client().get(url, environ_base={'SERVER_SOFTWARE': 'gunicorn/20.1.0'})
+    assert response.status_code == 204
+
+
+@pytest.mark.parametrize('server, config', [('Werkzeug/2.3.7', {}), ('gunicorn/20.1.0', {'LIVE_WSGI_STREAMS': True})])
+def test_event_stream_where_threads_may_block(app, seeded, server, config):
+    app.config.update(config)
+    response = app.test_client().get(f"/problem/{seeded['problems'][0]}/events",
+                                     environ_base={'SERVER_SOFTWARE': server})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert next(response.response).startswith(b'retry: ')
+    response.close()
@@ -0,0 +1,43 @@
+from techfix.extensions import db
+from techfix.models import User
+
+from conftest import PASSWORD, make_app
+
+
+def attempt(client, ip):
+    return client.post('/login', data={'username': 'nobody', 'password': 'wrong'},
+                       headers={'X-Forwarded-For': ip}).status_code
+
+
+def test_ip_limit_follows_the_client_behind_a_proxy(tmp_path):
+    app = make_app(tmp_path, PROXY_FIX_HOPS=1, RATELIMIT_BACKEND='memory',
+                   LOGIN_RATE_LIMITS={'ip': (2, 60), 'username': (100, 60)})
+    client = app.test_client()
+    assert [attempt(client, '198.51.100.1') for _ in range(3)] == [200, 200, 429]
+    assert attempt(client, '198.51.100.2') == 200
+
+
+def test_forwarded_header_is_ignored_without_a_proxy(tmp_path):
+    app = make_app(tmp_path, RATELIMIT_BACKEND='memory',
+                   LOGIN_RATE_LIMITS={'ip': (2, 60), 'username': (100, 60)})
+    client = app.test_client()
+    assert [attempt(client, f'198.51.100.{n}') for n in range(3)] == [200, 200, 429]
+
+
+def log_in_as(client, username, password):
+    return client.post('/login', data={'username': username, 'password': password}).status_code
+
+
+def test_only_failed_logins_count_against_the_account(tmp_path):
+    app = make_app(tmp_path, RATELIMIT_BACKEND='memory',
+                   LOGIN_RATE_LIMITS={'ip': (100, 60), 'username': (2, 60)})
+    with app.app_context():
+        user = User(username='dave', email='dave@example.com')
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+    client = app.test_client()
+
+    assert [log_in_as(client, 'dave', PASSWORD) for _ in range(3)] == [302, 302, 302]
+    assert [log_in_as(client, 'dave', 'wrong') for _ in range(3)] == [200, 200, 429]
+    assert log_in_as(client, 'dave', PASSWORD) == 429
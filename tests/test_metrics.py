@@ -0,0 +1,38 @@
+import re
+
+from conftest import make_app
+
+
+def scrape(app, **kwargs):
+    return app.test_client().get('/metrics', **kwargs)
+
+
+def about_requests(text):
+    match = re.search(r'techfix_requests_total\{method="GET",endpoint="main.about",status="200"[^}]*\} (\d+)', text)
+    return int(match.group(1)) if match else 0
+
+
+def test_metrics_only_for_local_or_token_holders(tmp_path):
+    app = make_app(tmp_path, METRICS_TOKEN='s3cret')
+    assert scrape(app).status_code == 200
+    assert scrape(app, headers={'X-Forwarded-For': '203.0.113.9'}).status_code == 404
+    assert scrape(app, environ_base={'REMOTE_ADDR': '203.0.113.9'}).status_code == 404
+    assert scrape(app, environ_base={'REMOTE_ADDR': '203.0.113.9'},
+                  headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+
+
+def test_sqlite_metrics_add_up_over_workers(tmp_path):
+    shared = {'METRICS_BACKEND': 'sqlite', 'METRICS_DATABASE': str(tmp_path / 'metrics.db')}
+    workers = [make_app(tmp_path / name, **shared) for name in ('one', 'two')]
+    for worker in workers:
+        worker.test_client().get('/about')
+        worker.extensions['techfix.instrumentation'].store.flush()
+    assert about_requests(scrape(workers[0]).get_data(as_text=True)) == 2
+
+
+def test_memory_metrics_are_per_process(tmp_path):
+    app = make_app(tmp_path)
+    app.test_client().get('/about')
+    text = scrape(app).get_data(as_text=True)
+    assert about_requests(text) == 1
+    assert 'techfix_request_duration_seconds_bucket{method="GET",endpoint="main.about",le="+Inf",pid=' in text
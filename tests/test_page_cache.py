@@ -0,0 +1,58 @@
+from techfix.extensions import db
+from techfix.models import Problem
+
+from conftest import log_in
+
+
+def post_quietly(app, seeded, title):
+    """A problem added behind the page cache's back"""
+    with app.app_context():
+        db.session.add(Problem(title=title, description='Nothing works.', category='Software',
+                               user_id=seeded['users']['alice']))
+        db.session.commit()
+
+
+def test_new_problem_invalidates_cached_pages(app, seeded):
+    visitor, author = app.test_client(), app.test_client()
+    log_in(author, seeded['users']['bob'])
+    assert 'Scanner' not in visitor.get('/browse').get_data(as_text=True)
+
+    post_quietly(app, seeded, 'Scanner is offline')
+    assert 'Scanner is offline' not in visitor.get('/browse').get_data(as_text=True)   # served from the cache
+
+    author.post('/submit', data={'title': 'Scanner prints blank pages', 'description': 'Every page.',
+                                 'category': 'Hardware'})
+    page = visitor.get('/browse').get_data(as_text=True)
+    assert 'Scanner prints blank pages' in page and 'Scanner is offline' in page
+
+
+def test_new_solution_invalidates_cached_pages(app, seeded):
+    visitor, author = app.test_client(), app.test_client()
+    log_in(author, seeded['users']['bob'])
+    unsolved = seeded['problems'][4]
+    assert f'/problem/{unsolved}"' in visitor.get('/browse?sort=unsolved').get_data(as_text=True)
+
+    author.post(f'/problem/{unsolved}/add-solution', data={'title': 'Fix', 'steps': 'Reboot'})
+    assert f'/problem/{unsolved}"' not in visitor.get('/browse?sort=unsolved').get_data(as_text=True)
+
+
+def test_logged_in_users_bypass_the_cache(app, seeded):
+    visitor, member = app.test_client(), app.test_client()
+    log_in(member, seeded['users']['carol'])
+    visitor.get('/browse')
+    post_quietly(app, seeded, 'Scanner is offline')
+
+    assert 'Scanner is offline' not in visitor.get('/browse').get_data(as_text=True)
+    assert 'Scanner is offline' in member.get('/browse').get_data(as_text=True)
+
+
+def test_pages_with_flashed_messages_are_neither_served_from_nor_stored_in_the_cache(app, seeded):
+    visitor, flashed = app.test_client(), app.test_client()
+    visitor.get('/browse')
+    post_quietly(app, seeded, 'Scanner is offline')
+    with flashed.session_transaction() as session:
+        session['_flashes'] = [('info', 'You have been logged out.')]
+
+    page = flashed.get('/browse').get_data(as_text=True)
+    assert 'You have been logged out.' in page and 'Scanner is offline' in page
+    assert 'You have been logged out.' not in app.test_client().get('/browse').get_data(as_text=True)
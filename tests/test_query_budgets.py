@@ -0,0 +1,52 @@
+"""Every page stays within its SQL query budget (logged-in pages include the user loader query).
+
+Each test has a fresh app, so its one request is never answered from the page cache.
+"""
+import pytest
+
+from techfix.database import count_queries, detect_search_backend
+from techfix.related_problems import related_index
+
+from conftest import log_in
+
+# (url, max queries, logged in as); {problem} is the problem with the most solutions
+BUDGETS = [
+    ('/', 1, None),
+    ('/about', 0, None),
+    ('/browse', 2, None),
+    ('/browse?sort=views', 2, None),
+    ('/browse?sort=solutions', 2, None),
+    ('/browse?sort=unsolved', 2, None),
+    ('/browse?search=windows', 2, None),
+    ('/browse?category=Software&sort=unsolved', 2, None),
+    ('/problems/similar?title=windows+wifi', 1, None),
+    ('/problem/{problem}', 3, None),
+    ('/problem/{problem}/add-solution', 2, 'bob'),
+    ('/profile/alice', 6, 'alice'),
+    ('/leaderboard', 2, None),
+    ('/leaderboard?category=Software', 2, None),
+    ('/api/v1/problems', 1, None),
+    ('/api/v1/problems?sort=views&fields=id,title', 1, None),
+    ('/api/v1/problems?ids=1,2,3', 1, None),
+    ('/api/v1/users?ids=1,2,3', 1, None),
+    ('/api/v1/problems/{problem}', 1, None),
+    ('/api/v1/problems/{problem}/solutions', 1, None),
+]
+
+
+@pytest.mark.parametrize('url, budget, user', BUDGETS)
+def test_query_budget(app, seeded, url, budget, user):
+    url = url.format(problem=seeded['problems'][0])
+    client = app.test_client()
+    if user:
+        log_in(client, seeded['users'][user])
+    with app.app_context():
+        # Both are set up once per worker, not per request
+        detect_search_backend()
+        related_index()
+
+    # A fresh app context gives the request its own session, as in production
+    with app.app_context(), count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    assert len(statements) <= budget, '\n'.join(' '.join(s.split())[:150] for s in statements)
@@ -0,0 +1,17 @@
+from techfix.commands import unindexed_steps
+
+
+def test_listing_queries_are_index_backed(app, seeded):
+    result = app.test_cli_runner().invoke(args=['explain-queries'])
+    assert result.exit_code == 0, result.output
+
+
+def test_scans_and_sorts_are_caught():
+    search = ['SCAN problem_search VIRTUAL TABLE INDEX 0:M3', 'SEARCH problems USING INTEGER PRIMARY KEY (rowid=?)',
+              'SCAN users_1 USING COVERING INDEX sqlite_autoindex_users_1 LEFT-JOIN', 'USE TEMP B-TREE FOR ORDER BY']
+    assert unindexed_steps(search, True, sorted_by_relevance=True) == [search[2]]
+    sorted_page = ['SEARCH problems USING INDEX ix_problems_category_created_at (category=?)',
+                   'USE TEMP B-TREE FOR ORDER BY']
+    assert unindexed_steps(sorted_page, True) == [sorted_page[1]]
+    assert unindexed_steps(['SCAN problems USING INDEX ix_problems_views'], True) == []
+    assert unindexed_steps(['SCAN problems USING INDEX ix_problems_views'], False) != []
@@ -0,0 +1,78 @@
+import time
+
+from sqlalchemy import text
+
+from techfix.extensions import db
+from techfix.models import Problem
+from techfix.related_problems import reindex_related, related_index
+
+from conftest import make_app
+
+
+def post_elsewhere(seeded):
+    """A problem written by another worker: nothing in this app's cache changes"""
+    problem = Problem(title='Windows wifi drops again', description='After sleep.', category='Software',
+                      user_id=seeded['users']['alice'])
+    db.session.add(problem)
+    db.session.commit()
+    return problem.id
+
+
+def search(title):
+    return [doc_id for doc_id, _ in related_index().search({'title': title})]
+
+
+def test_problems_from_other_workers_are_indexed_after_the_interval(app, seeded):
+    related = app.extensions['techfix.related']
+    with app.app_context():
+        related_index()
+        problem_id = post_elsewhere(seeded)
+        assert problem_id not in related_index()
+
+        related.synced_at -= related.sync_interval
+        assert problem_id in related_index()
+
+
+def test_edits_and_deletions_are_synced(app, seeded):
+    related = app.extensions['techfix.related']
+    edited, deleted = seeded['problems'][:2]
+    with app.app_context():
+        related_index()
+        problem = db.session.get(Problem, edited)
+        problem.title = 'Bluetooth headphones crackle'
+        db.session.execute(text('DELETE FROM problems WHERE id = :id'), {'id': deleted})
+        db.session.commit()
+
+        related.synced_at -= related.sync_interval
+        assert search('bluetooth headphones') == [edited]
+        assert deleted not in related_index()
+
+
+def test_reindex_picks_up_rows_imported_with_old_timestamps(app, seeded):
+    related = app.extensions['techfix.related']
+    with app.app_context():
+        related_index()
+        db.session.execute(text("UPDATE problems SET title = 'Bluetooth headphones crackle', "
+                                "updated_at = '2020-01-01 00:00:00.000000' WHERE id = :id"), {'id': seeded['problems'][0]})
+        db.session.commit()
+        related.synced_at -= related.sync_interval
+        assert search('bluetooth headphones') == []
+
+        reindex_related()
+        assert search('bluetooth headphones') == []    # not due yet
+        related.synced_at -= related.sync_interval
+        assert search('bluetooth headphones') == [seeded['problems'][0]]
+
+
+def test_index_is_built_off_the_request_path(tmp_path):
+    app = make_app(tmp_path, RELATED_EAGER=False, SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/site.db')
+    with app.app_context():
+        problem = Problem(title='Printer jams', description='Paper stuck.', user_id=1)
+        db.session.add(problem)
+        db.session.commit()
+        related_index()     # returns at once; a worker thread does the indexing
+
+        deadline = time.monotonic() + 5
+        while problem.id not in related_index() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert problem.id in related_index()
@@ -0,0 +1,30 @@
+from techfix.extensions import db
+from techfix.models import Solution
+from techfix.pagination import keyset_paginate
+from techfix.problems import browse_query
+
+
+def search(text):
+    query, sort_key, descending = browse_query(text, '', 'relevance')
+    problems, _ = keyset_paginate(query, sort_key, descending, per_page=20)
+    return [problem.id for problem in problems]
+
+
+def test_words_may_match_the_problem_or_any_of_its_solutions(app, seeded):
+    printers = seeded['problems'][0:4:2]  # the printer problems that have solutions
+    with app.app_context():
+        assert search('printer reboot') == printers
+        assert search('printer') == seeded['problems'][0::2]
+        assert search('printer nonsense') == []
+
+
+def test_solution_edits_reach_the_index(app, seeded):
+    with app.app_context():
+        solution = db.session.get(Solution, seeded['solutions'][0])
+        solution.steps = 'Reseat the toner cartridge'
+        db.session.commit()
+        assert search('toner') == [solution.problem_id]
+
+        db.session.delete(solution)
+        db.session.commit()
+        assert search('toner') == []
@@ -0,0 +1,44 @@
+from techfix.database import backfill_parsed_steps
+from techfix.extensions import db
+from techfix.models import Solution, Vote
+
+
+def test_steps_are_parsed_when_written(app, seeded):
+    with app.app_context():
+        solution = db.session.get(Solution, seeded['solutions'][0])
+        assert solution.parsed_steps == ['Update the driver', 'Reboot']
+
+        solution.steps = '  Unplug the router \n\n\nWait ten seconds\n  '
+        db.session.commit()
+        db.session.expire_all()
+        assert db.session.get(Solution, solution.id).parsed_steps == ['Unplug the router', 'Wait ten seconds']
+
+
+def test_backfill_fills_only_missing_steps(app, seeded):
+    first, second = seeded['solutions'][:2]
+    with app.app_context():
+        db.session.execute(db.update(Solution).where(Solution.id == first).values(parsed_steps=db.null()))
+        db.session.commit()
+
+        assert backfill_parsed_steps() == 1
+        assert backfill_parsed_steps() == 0
+        db.session.expire_all()
+        assert db.session.get(Solution, first).parsed_steps == ['Update the driver', 'Reboot']
+        assert db.session.get(Solution, second).parsed_steps == ['Update the driver', 'Reboot']
+
+
+def test_helpful_score_follows_votes(app, seeded):
+    users = seeded['users']
+    by_bob, by_carol = seeded['solutions'][:2]
+    with app.app_context():
+        assert db.session.get(Solution, by_bob).helpful_score == 100.0
+
+        db.session.add_all([Vote(user_id=users['carol'], solution_id=by_bob, value=-1),
+                            Vote(user_id=users['bob'], solution_id=by_carol, value=1)])
+        db.session.commit()
+        db.session.expire_all()
+        assert db.session.get(Solution, by_bob).helpful_score == 50.0
+
+        best = (Solution.query.filter(Solution.id.in_([by_bob, by_carol]))
+                .order_by(Solution.helpful_score.desc()).with_entities(Solution.id).all())
+        assert [row.id for row in best] == [by_carol, by_bob]
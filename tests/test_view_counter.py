@@ -0,0 +1,72 @@
+import sqlite3
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from sqlalchemy import text
+
+from techfix.extensions import db
+from techfix.models import Problem
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def stored_views(app, problem_id):
+    with app.app_context():
+        return db.session.scalar(db.select(Problem.views).where(Problem.id == problem_id))
+
+
+def test_views_are_buffered_until_flushed(app, seeded):
+    problem_id = seeded['problems'][0]
+    counter = app.extensions['techfix.view_counter']
+    client = app.test_client()
+    for _ in range(3):
+        assert client.get(f'/problem/{problem_id}').status_code == 200
+    assert stored_views(app, problem_id) == 0
+    assert counter.pending(problem_id) == 3
+
+    counter.flush()
+    assert stored_views(app, problem_id) == 3
+    assert counter.pending(problem_id) == 0
+
+
+def test_failed_flush_keeps_the_views(app, seeded):
+    problem_id = seeded['problems'][0]
+    counter = app.extensions['techfix.view_counter']
+    counter.increment(problem_id)
+    with app.app_context():
+        db.session.execute(text('ALTER TABLE problems RENAME TO problems_away'))
+        db.session.commit()
+    counter.flush()
+    assert counter.pending(problem_id) == 1
+
+    with app.app_context():
+        db.session.execute(text('ALTER TABLE problems_away RENAME TO problems'))
+        db.session.commit()
+    counter.increment(problem_id)
+    counter.flush()
+    assert stored_views(app, problem_id) == 2
+
+
+def test_pending_views_are_written_at_exit(tmp_path):
+    database = tmp_path / 'site.db'
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path[:0] = [{str(ROOT)!r}, {str(ROOT / 'tests')!r}]
+        from pathlib import Path
+        from conftest import make_app
+        from techfix.extensions import db
+        from techfix.models import Problem
+
+        app = make_app(Path({str(tmp_path)!r}), SQLALCHEMY_DATABASE_URI='sqlite:///{database}')
+        with app.app_context():
+            db.session.add(Problem(title='Printer jams', description='Paper stuck.', user_id=1))
+            db.session.commit()
+        for _ in range(4):
+            app.extensions['techfix.view_counter'].increment(1)
+    """)
+    subprocess.run([sys.executable, '-c', script], check=True, capture_output=True)
+
+    with sqlite3.connect(database) as conn:
+        assert conn.execute('SELECT views FROM problems WHERE id = 1').fetchone() == (4,)
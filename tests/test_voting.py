@@ -0,0 +1,56 @@
+import pytest
+
+from techfix.extensions import db
+from techfix.models import Solution, User, Vote
+
+from conftest import log_in
+
+
+@pytest.mark.parametrize('body', [
+    {'json': {'value': ['up']}},
+    {'json': {'value': 1}},
+    {'json': [1]},
+    {'json': 'up'},
+    {'data': {'value': 'sideways'}},
+    {},
+])
+def test_malformed_vote_is_rejected(app, seeded, body):
+    client = app.test_client()
+    log_in(client, seeded['users']['alice'])
+    response = client.post(f"/solution/{seeded['solutions'][0]}/vote", **body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('body', [{'json': {'value': 'down'}}, {'data': {'value': 'down'}}])
+def test_vote_from_form_or_json(app, seeded, body):
+    client = app.test_client()
+    log_in(client, seeded['users']['alice'])
+    response = client.post(f"/solution/{seeded['solutions'][0]}/vote", **body)
+    assert response.status_code == 200
+    assert response.get_json()['downvotes'] == 1
+    assert response.get_json()['upvotes'] == 0
+
+
+def test_own_solution_vote_is_refused(app, seeded):
+    client = app.test_client()
+    log_in(client, seeded['users']['bob'])     # bob wrote the first solution
+    url = f"/solution/{seeded['solutions'][0]}"
+    response = client.post(f'{url}/vote', json={'value': 'up'})
+    assert response.status_code == 403
+    assert 'error' in response.get_json()
+
+    response = client.post(f'{url}/upvote')
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        assert ('warning', "You can't vote on your own solution.") in session['_flashes']
+    with app.app_context():
+        assert db.session.get(Solution, seeded['solutions'][0]).upvotes == 1     # alice's vote only
+
+
+def test_sample_data_reputation_comes_from_votes(app):
+    app.test_client().get('/add-real-solutions')
+    with app.app_context():
+        helper = User.query.filter_by(username='techhelper').one()
+        assert Vote.query.count() == 4
+        assert helper.reputation == 4 * (10 + 15)     # one upvote and a verification per solution